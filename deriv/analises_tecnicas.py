@@ -3,7 +3,8 @@ import numpy as np
 
 class Indicador:
     def __init__(self, data):
-        self.data = np.array(data)
+        # asarray: fatias np.memmap do TickArchive (float64 contíguo) são usadas sem cópia.
+        self.data = np.asarray(data, dtype=np.float64)
 
     def calcular_sma(self, period):
         return talib.SMA(self.data, timeperiod=period)[-1]
@@ -0,0 +1,165 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+import numpy as np
+import request as req
+from log import get_logger
+from symbol import ActiveSymbol
+from tick_archive import CANDLE_FIELDS
+
+
+logger = get_logger("backfill")
+
+
+# Limite de itens por resposta do ticks_history; uma página cheia indica que o início do intervalo foi cortado.
+MAX_COUNT = 5000
+
+
+class RateLimiter:
+    """Token bucket: no máximo `rate` requisições por segundo, com rajadas de até `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self._rate = rate
+        self._burst = burst or max(int(rate), 1)
+        self._tokens = float(self._burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class Backfill:
+    """
+    Baixa histórico (ticks ou candles de `granularity` segundos) em páginas de ticks_history concorrentes,
+    distribuídas entre as conexões e limitadas por `max_in_flight` e `rate`. Cada symbol retoma do último
+    epoch no TickArchive e grava as páginas em ordem, em bloco; páginas cortadas em MAX_COUNT são subdivididas.
+    Candles só são baixados até o último fechado.
+    """
+
+    def __init__(self, conns, archive, *, granularity=0, page_seconds=None, max_in_flight=8, rate=20.0,
+                 window=8, retries=3, timeout=30.0):
+        self._conns = list(conns) if isinstance(conns, (list, tuple)) else [conns]
+        self._next_conn = itertools.cycle(self._conns)
+        self._archive = archive
+        self._granularity = granularity
+        # Ticks: assume no máximo 1 tick/s; symbols mais densos são resolvidos pela subdivisão.
+        self._page_seconds = page_seconds or (MAX_COUNT * granularity if granularity else MAX_COUNT)
+        self._max_in_flight = max_in_flight
+        self._limiter = RateLimiter(rate)
+        self._window = window
+        self._retries = retries
+        self._timeout = timeout
+        self._semaphore = None
+        self._stats = {'requests': 0, 'retries': 0, 'splits': 0, 'rows': 0, 'failed': []}
+
+    #region Backfill_Run
+    async def run(self, symbols=None, *, start=None, end=None, days=30):
+        """Preenche [start, end] (padrão: últimos `days` dias) para `symbols` (padrão: get_available_symbols())."""
+        if symbols is None:
+            symbols = [inst.symbol for inst in ActiveSymbol.get_available_symbols()]
+        end = int(end or time.time())
+        start = int(start or end - days * 86400)
+        self._semaphore = asyncio.Semaphore(self._max_in_flight)
+        started = time.perf_counter()
+        written = await asyncio.gather(*[self.backfill_symbol(symbol, start, end) for symbol in symbols])
+        self._stats['seconds'] = time.perf_counter() - started
+        return dict(zip(symbols, written))
+
+    async def backfill_symbol(self, symbol, start, end):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_in_flight)
+        if self._granularity:
+            # Só candles fechados: o candle em aberto seria gravado parcial e nunca corrigido (retomada em last + 1).
+            end = min(end, int(time.time())) // self._granularity * self._granularity - 1
+        series = self._archive.series(symbol, self._granularity)
+        series.flush()
+        last = series.last_epoch
+        if last is not None:
+            if start < series.first_epoch:
+                logger.warning("Backfill de %s: [%s, %s) é anterior aos dados arquivados e não será baixado "
+                               "(o arquivo só cresce para frente; use um diretório novo para preencher o início).",
+                               symbol, start, series.first_epoch)
+            start = max(start, last + 1)
+        written = 0
+        pending = deque()
+        try:
+            for page_start, page_end in self.pages(start, end):
+                pending.append(asyncio.ensure_future(self._fetch_page(symbol, page_start, page_end)))
+                # Só `window` páginas adiantadas por symbol: memória limitada e gravação sempre em ordem.
+                if len(pending) >= self._window:
+                    written += self._store(symbol, await pending.popleft())
+            while pending:
+                written += self._store(symbol, await pending.popleft())
+        except Exception as e:
+            for task in pending:
+                task.cancel()
+            self._stats['failed'].append(symbol)
+            logger.error("Backfill de %s interrompido após %s registros: %s", symbol, written, e)
+        return written
+
+    def pages(self, start, end):
+        if self._granularity:
+            start -= start % self._granularity
+        return [(page_start, min(page_start + self._page_seconds - 1, end))
+                for page_start in range(start, end + 1, self._page_seconds)]
+    #endregion
+
+    #region Backfill_Fetch
+    async def _fetch_page(self, symbol, start, end):
+        epochs, columns = await self._request(symbol, start, end)
+        if len(epochs) >= MAX_COUNT and epochs[0] > start:
+            # Resposta cortada: a API devolve os MAX_COUNT mais recentes; o trecho inicial vira subpáginas menores.
+            self._stats['splits'] += 1
+            span = max(int((epochs[-1] - epochs[0]) * 0.9), 1)
+            missing_end = int(epochs[0]) - 1
+            parts = await asyncio.gather(*[self._fetch_page(symbol, sub_start, min(sub_start + span - 1, missing_end))
+                                           for sub_start in range(start, missing_end + 1, span)])
+            parts.append((epochs, columns))
+            epochs = np.concatenate([part[0] for part in parts])
+            columns = {field: np.concatenate([part[1][field] for part in parts]) for field in columns}
+        return epochs, columns
+
+    async def _request(self, symbol, start, end):
+        msg = {**req.TICKS_HISTORY, "ticks_history": symbol, "start": start, "end": end, "count": MAX_COUNT}
+        if self._granularity:
+            msg.update(style="candles", granularity=self._granularity)
+        for attempt in range(self._retries + 1):
+            if attempt:
+                self._stats['retries'] += 1
+                await asyncio.sleep(min(2 ** attempt * 0.5, 10))
+            async with self._semaphore:
+                await self._limiter.acquire()
+                self._stats['requests'] += 1
+                response = await next(self._next_conn).send_request(msg, timeout=self._timeout)
+            if response and 'candles' in response:
+                candles = response['candles'] or []
+                return (np.array([c['epoch'] for c in candles], dtype=np.int64),
+                        {field: np.array([c[field] for c in candles], dtype=np.float64) for field in CANDLE_FIELDS})
+            if response and 'history' in response:
+                history = response['history']
+                return (np.array(history.get('times', []), dtype=np.int64),
+                        {'quote': np.array(history.get('prices', []), dtype=np.float64)})
+        raise RuntimeError(f"ticks_history de {symbol} [{start}, {end}] falhou após {self._retries + 1} tentativas.")
+
+    def _store(self, symbol, page):
+        epochs, columns = page
+        if not len(epochs):
+            return 0
+        rows = self._archive.series(symbol, self._granularity).extend(epochs, **columns)
+        self._stats['rows'] += rows
+        return rows
+    #endregion
+
+    @property
+    def stats(self):
+        return dict(self._stats)
@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import statistics
+import time
+from connection import Connector
+from fake_server import FakeDerivServer
+from symbol import Asset, ActiveSymbol, populate
+from trader_bot import DerivedBot
+from trade_parameters import TradeParameters
+import request as req
+
+
+class BotConnection:
+    """Adapta o Connector à interface esperada pelo DerivedBot (is_alive()/send())."""
+
+    def __init__(self, connector):
+        self._connector = connector
+
+    async def is_alive(self):
+        return self._connector.is_alive
+
+    async def send(self, msg):
+        response = await self._connector.send_request(msg)
+        if response is None:
+            return {'error': {'message': f"Sem resposta para {next(iter(msg))}"}}
+        return response
+
+
+def report(name, samples, unit='s'):
+    print(f"{name:<28} n={len(samples):<6} mean={statistics.mean(samples):.6f}{unit} "
+          f"min={min(samples):.6f}{unit} max={max(samples):.6f}{unit}")
+
+
+def bench_populate(server, repeat=20):
+    lst_asset_index = server.asset_index()
+    lst_active_symbols = server.active_symbols()
+    samples = []
+    for _ in range(repeat):
+        Asset.clear()
+        ActiveSymbol.clear()
+        started = time.perf_counter()
+        populate(lst_active_symbols=lst_active_symbols, lst_asset_index=lst_asset_index)
+        samples.append(time.perf_counter() - started)
+    report(f"populate({len(lst_asset_index)} symbols)", samples)
+    return samples
+
+
+async def bench_connector(connector, n_requests=2000, concurrency=50):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await connector.send_request(req.BALANCE)
+
+    connector.metrics.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n_requests)))
+    elapsed = time.perf_counter() - started
+    balance = connector.metrics.snapshot()['requests'].get('balance', {})
+    print(f"{'connector balance':<28} n={n_requests:<6} {n_requests / elapsed:.1f} req/s "
+          f"p50={balance.get('p50_ms') or 0:.3f}ms p99={balance.get('p99_ms') or 0:.3f}ms "
+          f"errors={balance.get('errors')} timeouts={balance.get('timeouts')}")
+    return n_requests / elapsed
+
+
+async def bench_bot(connector, n_trades=200, n_bots=10):
+    conn = BotConnection(connector)
+    bots = [DerivedBot.create_robot(conn) for _ in range(n_bots)]
+    done = 0
+    failures = 0
+
+    async def worker(bot, trades):
+        nonlocal done, failures
+        for _ in range(trades):
+            try:
+                await bot.run()
+                done += 1
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(bot, n_trades // n_bots) for bot in bots))
+    elapsed = time.perf_counter() - started
+    DerivedBot._bots = [bot for bot in DerivedBot._bots if bot not in bots]
+    print(f"{'DerivedBot proposal+buy':<28} n={done:<6} {done / elapsed:.1f} trades/s failures={failures}")
+    return done / elapsed
+
+
+async def check_bot(connector):
+    """Executa rise e fall de ponta a ponta com a validação por contracts_for ligada; falha se algum for recusado."""
+    DerivedBot.set_trade_parameters(TradeParameters(connector))
+    bot = DerivedBot.create_robot(BotConnection(connector))
+    try:
+        for contract_type in ("rise", "fall"):
+            bot.set_contract_parameters(1.0, 0.25, contract_type)
+            await bot.run()
+        bot.set_contract_parameters(1.0, 5000 * 24 * 60, "rise")
+        try:
+            await bot.run()
+        except ValueError:
+            pass
+        else:
+            raise RuntimeError("Duração fora dos limites do contracts_for não foi recusada.")
+    finally:
+        DerivedBot.set_trade_parameters(None)
+        DerivedBot.remove_robot(bot.id)
+    print(f"{'DerivedBot com validação':<28} ok")
+
+
+async def main(*, latency, jitter, symbols, requests, concurrency, trades, bots):
+    async with FakeDerivServer(latency=latency, jitter=jitter, n_symbols=symbols) as server:
+        print(f"Servidor local {server.url} latency={latency}s jitter={jitter}s symbols={symbols}")
+        bench_populate(server)
+        Connector.set_endpoint(server.url)
+        connector = Connector(app_id="1", token="fake")
+        await connector.connect("1", "fake")
+        try:
+            await check_bot(connector)
+            await bench_connector(connector, requests, concurrency)
+            await bench_bot(connector, trades, bots)
+        finally:
+            await connector.disconnect()
+            Connector.set_endpoint()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks contra o servidor Deriv local.")
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--trades', type=int, default=200)
+    parser.add_argument('--bots', type=int, default=10)
+    asyncio.run(main(**vars(parser.parse_args())))
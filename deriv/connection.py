@@ -1,12 +1,22 @@
 import asyncio
+import itertools
+import time
 import websockets
 from deriv_api import DerivAPI, APIError
 from csv import DictReader
 from pathlib import Path
 from datetime import datetime
+from metrics import ConnMetrics
+from log import get_logger
+from router import RoutingConnection, TickBuffer
 
 
 KNV_FILE = Path(Path(__file__).parent, "knv.csv")
+DERIV_ENDPOINT = "wss://ws.binaryws.com/websockets/v3"
+# req_id das assinaturas roteadas, longe da sequência do DerivAPI (que começa em 1).
+ROUTED_REQ_ID_BASE = 1_000_000_000
+
+logger = get_logger("connection")
 
 class AppDashboard:
 
@@ -125,34 +135,72 @@ class Connector:
     _connection_open = None
     _connection_close = None
     _disconnect_status = None
+    _metrics = None
+    _endpoint = DERIV_ENDPOINT
+    _connection_factory = staticmethod(websockets.connect)
+    _recorder = None
+    _router = None
+    _req_ids = itertools.count(ROUTED_REQ_ID_BASE)
 
 
     def __new__(cls, app_id, token):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            cls._instance._metrics = ConnMetrics()
+            cls._instance._tick_buffers = {}
         return cls._instance
 
+    @classmethod
+    def set_endpoint(cls, endpoint=DERIV_ENDPOINT):
+        cls._endpoint = endpoint
+
+    @classmethod
+    def set_connection_factory(cls, factory=websockets.connect):
+        cls._connection_factory = staticmethod(factory)
+
+    @classmethod
+    def set_recorder(cls, recorder=None):
+        cls._recorder = recorder
+
     async def connect(self, app_id, token):
         if self.is_alive:
-            print("Já conectado ao servidor.")
+            logger.info("Já conectado ao servidor.")
             return await self._api.authorize(token)
         response = None
+        self._metrics.request_started()
+        started = time.perf_counter()
         try:
-            self._connection = await websockets.connect(f"wss://ws.binaryws.com/websockets/v3?app_id={app_id}")
+            self._connection = await self._connection_factory(f"{self._endpoint}?app_id={app_id}")
+            if self._recorder:
+                self._connection = self._recorder.wrap(self._connection)
+            self._router = RoutingConnection(self._connection)
+            self._connection = self._router
             self._api = DerivAPI(connection=self._connection)
             response = await asyncio.wait_for(self._api.authorize(token), timeout=5.0)
+            self._metrics.request_finished('authorize', (time.perf_counter() - started) * 1000)
             self._connection_open = datetime.now()
             self._connection_close = None
             self._disconnect_status = None
+        except asyncio.TimeoutError:
+            self._metrics.request_finished('authorize', (time.perf_counter() - started) * 1000, timeout=True)
+            logger.error("Falha ao conectar à API Deriv: tempo de autorização esgotado.")
+            if self._connection and not self._connection.closed:
+                await self._connection.close()
+            self._connection_close = datetime.now()
+            self._disconnect_status = "timeout"
+            self._connection = None
+            self._api = None
         except APIError as e:
-            print(f"Falha ao conectar à API Deriv (APIError): {e}")
+            self._metrics.request_finished('authorize', (time.perf_counter() - started) * 1000, error=True)
+            logger.error("Falha ao conectar à API Deriv (APIError): %s", e)
             if self._connection and self._connection.closed:
                 self._connection_close = datetime.now()
                 self._disconnect_status = "falha"
             self._connection = None
             self._api = None
         except Exception as e:
-            print(f"Falha ao conectar à API Deriv (Outro erro): {e}")
+            self._metrics.request_finished('authorize', (time.perf_counter() - started) * 1000, error=True)
+            logger.error("Falha ao conectar à API Deriv (Outro erro): %s", e)
             if self._connection and self._connection.closed:
                 self._connection_close = datetime.now()
                 self._disconnect_status = "falha"
@@ -162,7 +210,7 @@ class Connector:
 
     async def disconnect(self):
         if not self.is_alive:
-            print("Conexão já está fechada.")
+            logger.info("Conexão já está fechada.")
             return
         await self._connection.close()
         self._connection_close = datetime.now()
@@ -170,22 +218,35 @@ class Connector:
         self._connection = None
         self._api = None
 
-    async def send_request(self, msg):
+    async def send_request(self, msg, timeout=None):
         if not self.is_alive:
-            print("Não conectado ao servidor.")
+            logger.warning("Não conectado ao servidor.")
             return None
         response = None
+        msg_type = ConnMetrics.msg_type(msg)
+        self._metrics.request_started()
+        started = time.perf_counter()
         try:
-            response = await self._api.send(msg)
+            # O DerivAPI grava o req_id na própria mensagem; copia para não corromper dicts compartilhados (ex.: request.py).
+            if timeout:
+                response = await asyncio.wait_for(self._api.send(dict(msg)), timeout=timeout)
+            else:
+                response = await self._api.send(dict(msg))
+            self._metrics.request_finished(msg_type, (time.perf_counter() - started) * 1000)
+        except asyncio.TimeoutError:
+            self._metrics.request_finished(msg_type, (time.perf_counter() - started) * 1000, timeout=True)
+            logger.warning("Tempo esgotado na requisição '%s' após %ss.", msg_type, timeout)
         except APIError as e:
-            print(f"Erro na requisição à API Deriv (APIError): {e}")
+            self._metrics.request_finished(msg_type, (time.perf_counter() - started) * 1000, error=True)
+            logger.error("Erro na requisição à API Deriv (APIError): %s", e)
             if self._connection and self._connection.closed:
                 self._connection_close = datetime.now()
                 self._disconnect_status = "falha"
                 self._connection = None
                 self._api = None
         except Exception as e:
-            print(f"Erro na requisição (Outro erro): {e}")
+            self._metrics.request_finished(msg_type, (time.perf_counter() - started) * 1000, error=True)
+            logger.error("Erro na requisição (Outro erro): %s", e)
             if self._connection and self._connection.closed:
                 self._connection_close = datetime.now()
                 self._disconnect_status = "falha"
@@ -193,6 +254,43 @@ class Connector:
                 self._api = None
         return response
 
+    #region Connector_Streams
+    async def subscribe(self, msg, handler):
+        """Assina um stream com entrega roteada: cada mensagem vai direto para handler(msg). Devolve o subscription.id."""
+        if not self.is_alive:
+            logger.warning("Não conectado ao servidor.")
+            return None
+        req_id = next(self._req_ids)
+        self._router.route(req_id, handler)
+        response = await self.send_request({**msg, "subscribe": 1, "req_id": req_id})
+        if not response or 'subscription' not in response:
+            self._router.unroute(req_id=req_id)
+            return None
+        return response['subscription']['id']
+
+    async def unsubscribe(self, subscription_id):
+        self._router.unroute(subscription_id)
+        return await self.send_request({"forget": subscription_id})
+
+    async def subscribe_ticks(self, symbol, handler=None, *, capacity=4096):
+        """Ticks de `symbol` gravados direto no TickBuffer do symbol; handler opcional (ex.: StrategyEngine.on_tick_message)."""
+        buffer = self._tick_buffers.get(symbol)
+        if buffer is None:
+            buffer = self._tick_buffers[symbol] = TickBuffer(capacity)
+        write = buffer.write
+
+        def on_tick(message):
+            tick = message['tick']
+            write(tick['epoch'], tick['quote'])
+            if handler:
+                handler(message)
+
+        return await self.subscribe({"ticks": symbol}, on_tick)
+
+    def tick_buffer(self, symbol):
+        return self._tick_buffers.get(symbol)
+    #endregion
+
 
     @property
     def is_alive(self):
@@ -210,6 +308,22 @@ class Connector:
     def disconnect_status(self):
         return self._disconnect_status
 
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def endpoint(self):
+        return self._endpoint
+
+    @property
+    def recorder(self):
+        return self._recorder
+
+    @property
+    def router(self):
+        return self._router
+
 class ConnManager:
     
     _instance = None
@@ -237,26 +351,43 @@ class ConnManager:
                     loginid=response['authorize']['loginid'],
                     scopes=response['authorize']['scopes']
                 )
-                print(f"Usuário logado com sucesso: LoginID={self._user_account.loginid}, Balance={self._user_account.balance} {self._user_account.currency}, Currency Type={self._user_account.currency_type}, Is Virtual={self._user_account.is_virtual}, Scopes={self._user_account.scopes}")
+                logger.info("Usuário logado com sucesso: LoginID=%s, Balance=%s %s, Currency Type=%s, Is Virtual=%s, Scopes=%s",
+                            self._user_account.loginid, self._user_account.balance, self._user_account.currency,
+                            self._user_account.currency_type, self._user_account.is_virtual, self._user_account.scopes)
+                self._connector.metrics.start_exporter()
         else:
-            print("Conexão já está ativa.")
+            logger.info("Conexão já está ativa.")
 
     async def disconnect(self):
         await self._connector.disconnect()
+        await self._connector.metrics.stop_exporter()
         if not self._connector.is_alive:
-            print("Usuário deslogado")
+            logger.info("Usuário deslogado")
             self._user_account = None
-        print(f"Conexão desconectada: Status={self._connector.disconnect_status}, Fechada em={self._connector.connection_close}")
+        logger.info("Conexão desconectada: Status=%s, Fechada em=%s", self._connector.disconnect_status, self._connector.connection_close)
+
+    async def send_request(self, msg, timeout=None):
+        return await self._connector.send_request(msg, timeout=timeout)
+
+    async def subscribe_ticks(self, symbol, handler=None):
+        return await self._connector.subscribe_ticks(symbol, handler)
 
-    async def send_request(self, msg):
-        return await self._connector.send_request(msg)
+    async def unsubscribe(self, subscription_id):
+        return await self._connector.unsubscribe(subscription_id)
+
+    def metrics_snapshot(self):
+        return self._connector.metrics.snapshot()
+
+    @property
+    def metrics(self):
+        return self._connector.metrics
 
     async def update_balance(self):
         if not self._connector.is_alive:
-            print("Não conectado ao servidor para atualizar saldo.")
+            logger.warning("Não conectado ao servidor para atualizar saldo.")
             return
         if self._user_account is None:
-            print("Nenhum usuário logado para atualizar saldo.")
+            logger.warning("Nenhum usuário logado para atualizar saldo.")
             return
         response = await self._connector.send_request({"balance": 1})
         if response:
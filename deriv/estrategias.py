@@ -1,4 +1,5 @@
-from deriv.analises_tecnicas import Indicador
+import numpy as np
+from analises_tecnicas import Indicador
 
 class Estrategia:
     def __init__(self, data):
@@ -6,4 +7,61 @@ class Estrategia:
 
     def estrategia_sma(self, period):
         sma = self.indicador.calcular_sma(period)
-        return sma > self.indicador.data[-1]  # Exemplo: compra se preço > SMA
\ No newline at end of file
+        return sma > self.indicador.data[-1]  # Exemplo: compra se preço > SMA
+
+
+class Dependencia:
+    """
+    Declara um indicador TA-Lib usado por uma estratégia: função, parâmetros e fonte.
+    A fonte é uma série de preço ('close', 'open', 'high', 'low') ou outra Dependencia (encadeamento).
+    Dependências com a mesma chave são calculadas uma única vez pelo StrategyEngine.
+    """
+
+    def __init__(self, funcao, *, fonte='close', saida=0, **parametros):
+        self.funcao = funcao.upper()
+        self.fonte = fonte
+        self.saida = saida
+        self.parametros = parametros
+
+    @property
+    def key(self):
+        fonte = self.fonte.key if isinstance(self.fonte, Dependencia) else self.fonte
+        return (self.funcao, fonte, tuple(sorted(self.parametros.items())), self.saida)
+
+    def __repr__(self):
+        return f"{self.funcao}({', '.join(f'{k}={v}' for k, v in sorted(self.parametros.items()))})"
+
+
+class EstrategiaIndicadores:
+    """
+    Estratégia declarativa: lista em `dependencias` (alias -> Dependencia) os indicadores de que precisa
+    e recebe em `sinal` os últimos valores já calculados. Devolve 'rise', 'fall' ou None.
+    """
+    dependencias = {}
+
+    def sinal(self, valores, preco):
+        raise NotImplementedError
+
+    def sinais(self, valores, precos):
+        """Versão vetorizada sobre arrays completos (+1 rise, -1 fall, 0 nada); padrão chama `sinal` por índice."""
+        resultado = np.zeros(len(precos), dtype=np.int8)
+        for i in range(len(precos)):
+            sinal = self.sinal({alias: serie[i] for alias, serie in valores.items()}, precos[i])
+            resultado[i] = 1 if sinal == 'rise' else -1 if sinal == 'fall' else 0
+        return resultado
+
+
+class EstrategiaSMA(EstrategiaIndicadores):
+    def __init__(self, period=14):
+        self.period = period
+        self.dependencias = {'sma': Dependencia('SMA', timeperiod=period)}
+
+    def sinal(self, valores, preco):
+        sma = valores['sma']
+        if np.isnan(sma):
+            return None
+        return 'rise' if sma > preco else 'fall'  # Mesmo critério de Estrategia.estrategia_sma
+
+    def sinais(self, valores, precos):
+        sma = valores['sma']
+        return np.where(np.isnan(sma), 0, np.where(sma > precos, 1, -1)).astype(np.int8)
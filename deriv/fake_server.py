@@ -0,0 +1,418 @@
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+import websockets
+
+
+# Subconjunto de contratos usado pelo asset_index sintético: [group, modality, min, max].
+ASSET_TEMPLATES = [
+    ["callput", "Rise/Fall", "1t", "10t"],
+    ["callput", "Rise/Fall", "15s", "1d"],
+    ["callput", "Higher/Lower", "5t", "10t"],
+    ["callput", "Higher/Lower", "15s", "365d"],
+    ["touchnotouch", "Touch/No Touch", "5t", "10t"],
+    ["touchnotouch", "Touch/No Touch", "2m", "365d"],
+    ["endsinout", "Ends Between/Ends Outside", "2m", "365d"],
+    ["digits", "Matches/Differs", "1t", "10t"],
+    ["digits", "Even/Odd", "1t", "10t"],
+    ["digits", "Over/Under", "1t", "10t"],
+]
+
+# Histórico sintético para ticks_history: um tick a cada HISTORY_INTERVAL segundos, no máximo HISTORY_MAX_COUNT por resposta.
+HISTORY_INTERVAL = 2
+HISTORY_MAX_COUNT = 5000
+
+# Sessões (UTC) por mercado para trading_times: (aberturas, fechamentos, abre no fim de semana).
+MARKET_SESSIONS = {
+    "synthetic_index": (["00:00:00"], ["23:59:59"], True),
+    "forex": (["00:00:00"], ["23:59:59"], False),
+    "indices": (["07:00:00", "13:00:00"], ["11:30:00", "15:30:00"], False),
+    "commodities": (["01:00:00"], ["21:00:00"], False),
+}
+
+MARKETS = [
+    ("synthetic_index", "Derived", "random_index", "Continuous Indices"),
+    ("forex", "Forex", "major_pairs", "Major Pairs"),
+    ("indices", "Stock Indices", "europe_OTC", "European indices"),
+    ("commodities", "Commodities", "metals", "Metals"),
+]
+
+# contract_types e barreiras de cada modalidade do asset_index, para contracts_for.
+MODALITY_CONTRACTS = {
+    "Rise/Fall": (("CALL", "PUT"), 0),
+    "Higher/Lower": (("CALL", "PUT"), 1),
+    "Touch/No Touch": (("ONETOUCH", "NOTOUCH"), 1),
+    "Ends Between/Ends Outside": (("EXPIRYRANGE", "EXPIRYMISS"), 2),
+    "Matches/Differs": (("DIGITMATCH", "DIGITDIFF"), 1),
+    "Even/Odd": (("DIGITEVEN", "DIGITODD"), 0),
+    "Over/Under": (("DIGITOVER", "DIGITUNDER"), 1),
+}
+
+BASE_SYMBOLS = ["R_10", "R_25", "R_50", "R_75", "R_100"]
+
+
+def build_universe(n_symbols=50, seed=0):
+    """Gera um universo sintético de symbols com os campos de active_symbols e asset_index."""
+    rnd = random.Random(seed)
+    names = BASE_SYMBOLS[:n_symbols] + [f"SYN{i:04d}" for i in range(max(n_symbols - len(BASE_SYMBOLS), 0))]
+    universe = []
+    for index, symbol in enumerate(names):
+        market, market_display_name, submarket, submarket_display_name = MARKETS[0 if symbol in BASE_SYMBOLS else index % len(MARKETS)]
+        universe.append({
+            'symbol': symbol,
+            'display_name': f"Volatility {symbol[2:]} Index" if symbol in BASE_SYMBOLS else f"Synthetic {symbol}",
+            'exchange_is_open': 1 if symbol in BASE_SYMBOLS or rnd.random() > 0.2 else 0,
+            'is_trading_suspended': 0 if symbol in BASE_SYMBOLS or rnd.random() > 0.05 else 1,
+            'market': market,
+            'market_display_name': market_display_name,
+            'submarket': submarket,
+            'submarket_display_name': submarket_display_name,
+            'pip': 0.001,
+            'assets': [template for template in ASSET_TEMPLATES if symbol in BASE_SYMBOLS or rnd.random() > 0.4],
+            'spot': round(rnd.uniform(100, 10000), 3),
+        })
+    return universe
+
+
+class FakeDerivServer:
+    """
+    Servidor websocket local que responde ao subconjunto do protocolo Deriv usado pelo pacote.
+    A latência de cada resposta é latency + uniform(0, jitter) segundos.
+    """
+
+    def __init__(self, *, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, n_symbols=50,
+                 tick_interval=1.0, balance=10000.0, payout_rate=0.95, seed=0):
+        self._host = host
+        self._port = port
+        self._latency = latency
+        self._jitter = jitter
+        self._tick_interval = tick_interval
+        self._balance = balance
+        self._payout_rate = payout_rate
+        self._random = random.Random(seed)
+        self._universe = build_universe(n_symbols, seed)
+        self._spots = {sym['symbol']: sym['spot'] for sym in self._universe}
+        self._universe_spots = dict(self._spots)
+        self._ids = itertools.count(1)
+        self._server = None
+        self._requests = 0
+
+    #region FakeDerivServer_Lifecycle
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self._host, self._port)
+        self._port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    @property
+    def url(self):
+        return f"ws://{self._host}:{self._port}"
+
+    @property
+    def universe(self):
+        return self._universe
+
+    @property
+    def requests(self):
+        return self._requests
+    #endregion
+
+    #region FakeDerivServer_Payloads
+    def asset_index(self):
+        return [[sym['symbol'], sym['display_name'], [list(asset) for asset in sym['assets']]] for sym in self._universe]
+
+    def active_symbols(self):
+        keys = ['symbol', 'display_name', 'exchange_is_open', 'is_trading_suspended', 'market', 'market_display_name', 'submarket', 'submarket_display_name', 'pip']
+        return [{key: sym[key] for key in keys} for sym in self._universe]
+
+    def _next_quote(self, symbol):
+        spot = self._spots.get(symbol, 1000.0)
+        spot = round(max(spot * (1 + self._random.gauss(0, 0.0005)), 0.001), 3)
+        self._spots[symbol] = spot
+        return spot
+    #endregion
+
+    #region FakeDerivServer_Protocol
+    async def _handler(self, websocket, path=None):
+        session = {'authorized': False, 'balance': self._balance, 'subscriptions': {}}
+        try:
+            async for raw in websocket:
+                self._requests += 1
+                asyncio.create_task(self._respond(websocket, session, raw))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in session['subscriptions'].values():
+                task.cancel()
+
+    async def _respond(self, websocket, session, raw):
+        try:
+            request = json.loads(raw)
+        except ValueError:
+            return
+        delay = self._latency + (self._random.uniform(0, self._jitter) if self._jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        method = next(iter(request), None)
+        handler = getattr(self, f"_on_{method}", None)
+        if handler is None:
+            response = self._error(request, method, "UnrecognisedRequest", "Unrecognised request.")
+        elif method not in ('authorize', 'ping', 'time', 'active_symbols', 'asset_index', 'trading_times', 'contracts_for', 'ticks_history', 'forget', 'forget_all', 'ticks', 'proposal') and not session['authorized']:
+            response = self._error(request, method, "AuthorizationRequired", "Please log in.")
+        else:
+            response = handler(websocket, session, request)
+        if response is not None:
+            await self._send(websocket, response)
+
+    async def _send(self, websocket, response):
+        try:
+            await websocket.send(json.dumps(response))
+        except websockets.ConnectionClosed:
+            pass
+
+    @staticmethod
+    def _reply(request, msg_type, payload, **extra):
+        response = {'echo_req': request, 'msg_type': msg_type, msg_type: payload, **extra}
+        if 'req_id' in request:
+            response['req_id'] = request['req_id']
+        return response
+
+    @staticmethod
+    def _error(request, msg_type, code, message):
+        response = {'echo_req': request, 'msg_type': msg_type, 'error': {'code': code, 'message': message}}
+        if 'req_id' in request:
+            response['req_id'] = request['req_id']
+        return response
+
+    def _subscribe(self, websocket, session, request, msg_type, stream):
+        sub_id = f"{next(self._ids):032x}"
+
+        async def run():
+            try:
+                async for payload in stream:
+                    await self._send(websocket, self._reply(request, msg_type, payload, subscription={'id': sub_id}))
+            finally:
+                session['subscriptions'].pop(sub_id, None)
+
+        session['subscriptions'][sub_id] = asyncio.create_task(run())
+        return sub_id
+
+    def _on_ping(self, websocket, session, request):
+        return self._reply(request, 'ping', 'pong')
+
+    def _on_time(self, websocket, session, request):
+        return self._reply(request, 'time', int(time.time()))
+
+    def _on_authorize(self, websocket, session, request):
+        session['authorized'] = True
+        return self._reply(request, 'authorize', {
+            'balance': session['balance'],
+            'currency': 'USD',
+            'account_list': [{'currency': 'USD', 'currency_type': 'fiat', 'is_virtual': 1, 'loginid': 'VRTC0000001'}],
+            'is_virtual': 1,
+            'loginid': 'VRTC0000001',
+            'scopes': ['read', 'trade'],
+            'email': 'fake@localhost',
+            'fullname': 'Fake Server',
+        })
+
+    def _on_balance(self, websocket, session, request):
+        return self._reply(request, 'balance', {'balance': round(session['balance'], 2), 'currency': 'USD', 'loginid': 'VRTC0000001'})
+
+    def _on_asset_index(self, websocket, session, request):
+        return self._reply(request, 'asset_index', self.asset_index())
+
+    def _on_active_symbols(self, websocket, session, request):
+        return self._reply(request, 'active_symbols', self.active_symbols())
+
+    def _on_trading_times(self, websocket, session, request):
+        date = request.get('trading_times')
+        date = time.strftime('%Y-%m-%d', time.gmtime()) if date == 'today' else date
+        try:
+            weekend = time.strptime(date, '%Y-%m-%d').tm_wday >= 5
+        except (TypeError, ValueError):
+            return self._error(request, 'trading_times', "InputValidationFailed", f"Invalid date {date}.")
+        markets = {}
+        for sym in self._universe:
+            opens, closes, all_week = MARKET_SESSIONS[sym['market']]
+            times = {'open': opens, 'close': closes} if all_week or not weekend else {'open': ['--'], 'close': ['--']}
+            market = markets.setdefault(sym['market_display_name'], {})
+            market.setdefault(sym['submarket_display_name'], []).append({
+                'symbol': sym['symbol'], 'name': sym['display_name'], 'times': {**times, 'settlement': '23:59:59'},
+                'trading_days': ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'] if all_week else ['Mon', 'Tue', 'Wed', 'Thu', 'Fri'],
+            })
+        return self._reply(request, 'trading_times', {'markets': [
+            {'name': name, 'submarkets': [{'name': sub_name, 'symbols': symbols} for sub_name, symbols in submarkets.items()]}
+            for name, submarkets in markets.items()
+        ]})
+
+    def _on_contracts_for(self, websocket, session, request):
+        sym = next((sym for sym in self._universe if sym['symbol'] == request.get('contracts_for')), None)
+        if sym is None:
+            return self._error(request, 'contracts_for', "InvalidSymbol", f"Symbol {request.get('contracts_for')} is invalid.")
+        available = []
+        for group, modality, min_duration, max_duration in sym['assets']:
+            contract_types, barriers = MODALITY_CONTRACTS[modality]
+            for contract_type in contract_types:
+                available.append({
+                    'contract_category': group, 'contract_display': modality, 'contract_type': contract_type,
+                    'barriers': barriers, 'min_contract_duration': min_duration, 'max_contract_duration': max_duration,
+                    'expiry_type': 'tick' if min_duration.endswith('t') else 'intraday', 'start_type': 'spot',
+                    'market': sym['market'], 'submarket': sym['submarket'], 'underlying_symbol': sym['symbol'],
+                })
+        return self._reply(request, 'contracts_for', {'available': available, 'spot': self._spots[sym['symbol']]})
+
+    def _on_ticks(self, websocket, session, request):
+        symbol = request.get('ticks')
+        if symbol not in self._spots:
+            return self._error(request, 'tick', "InvalidSymbol", f"Symbol {symbol} is invalid.")
+        if not request.get('subscribe'):
+            return self._reply(request, 'tick', self._tick(symbol))
+
+        async def stream():
+            while True:
+                yield self._tick(symbol)
+                await asyncio.sleep(self._tick_interval)
+
+        self._subscribe(websocket, session, request, 'tick', stream())
+        return None
+
+    def _tick(self, symbol):
+        return {'symbol': symbol, 'epoch': int(time.time()), 'quote': self._next_quote(symbol), 'pip_size': 3}
+
+    def _history_quote(self, symbol, epoch):
+        # Determinístico por (symbol, epoch): páginas repetidas ou sobrepostas devolvem os mesmos valores.
+        phase = sum(map(ord, symbol)) % 97
+        return round(self._universe_spots[symbol] * (1 + 0.002 * math.sin(epoch / 97 + phase)), 3)
+
+    def _on_ticks_history(self, websocket, session, request):
+        symbol = request.get('ticks_history')
+        if symbol not in self._spots:
+            return self._error(request, 'history', "InvalidSymbol", f"Symbol {symbol} is invalid.")
+        now = int(time.time())
+        end = now if request.get('end', 'latest') == 'latest' else min(int(request['end']), now)
+        count = min(int(request.get('count', HISTORY_MAX_COUNT)), HISTORY_MAX_COUNT)
+        start = int(request.get('start', end - count * HISTORY_INTERVAL))
+        if request.get('style') == 'candles':
+            granularity = int(request.get('granularity', 60))
+            buckets = range(start - start % granularity, end + 1, granularity)
+            buckets = buckets[-count:] if len(buckets) > count else buckets
+            candles = []
+            for bucket in buckets:
+                epochs = range(max(bucket, start) + (-max(bucket, start)) % HISTORY_INTERVAL, min(bucket + granularity, end + 1), HISTORY_INTERVAL)
+                if not epochs:
+                    continue
+                quotes = [self._history_quote(symbol, epoch) for epoch in epochs]
+                candles.append({'epoch': bucket, 'open': quotes[0], 'high': max(quotes), 'low': min(quotes), 'close': quotes[-1]})
+            return self._reply(request, 'candles', candles, pip_size=3)
+        # Como na API real, um intervalo com mais de `count` ticks devolve os `count` mais recentes.
+        epochs = range(start + (-start) % HISTORY_INTERVAL, end + 1, HISTORY_INTERVAL)
+        epochs = epochs[-count:] if len(epochs) > count else epochs
+        return self._reply(request, 'history', {'prices': [self._history_quote(symbol, epoch) for epoch in epochs], 'times': list(epochs)}, pip_size=3)
+
+    def _on_proposal(self, websocket, session, request):
+        symbol = request.get('symbol')
+        amount = request.get('amount')
+        if symbol not in self._spots:
+            return self._error(request, 'proposal', "InvalidSymbol", f"Symbol {symbol} is invalid.")
+        if not isinstance(amount, (int, float)) or amount <= 0:
+            return self._error(request, 'proposal', "InvalidAmount", "Invalid stake.")
+        return self._reply(request, 'proposal', {
+            'id': f"{next(self._ids):032x}",
+            'ask_price': amount,
+            'payout': round(amount * (1 + self._payout_rate), 2),
+            'spot': self._spots[symbol],
+            'spot_time': int(time.time()),
+            'date_start': int(time.time()),
+            'display_value': f"{amount:.2f}",
+            'longcode': f"{request.get('contract_type')} {symbol} {request.get('duration')}{request.get('duration_unit')}",
+        })
+
+    def _on_buy(self, websocket, session, request):
+        parameters = request.get('parameters') or {}
+        price = request.get('price')
+        if not isinstance(price, (int, float)) or price <= 0:
+            return self._error(request, 'buy', "InvalidPrice", "Invalid price.")
+        if price > session['balance']:
+            return self._error(request, 'buy', "InsufficientBalance", "Insufficient balance.")
+        session['balance'] -= price
+        contract_id = next(self._ids)
+        payout = round(price * (1 + self._payout_rate), 2)
+        response = self._reply(request, 'buy', {
+            'contract_id': contract_id,
+            'transaction_id': next(self._ids),
+            'buy_price': price,
+            'balance_after': round(session['balance'], 2),
+            'payout': payout,
+            'start_time': int(time.time()),
+            'longcode': f"{parameters.get('contract_type')} {parameters.get('symbol')}",
+        })
+        session.setdefault('contracts', {})[contract_id] = {'price': price, 'payout': payout, 'parameters': parameters}
+        if request.get('subscribe'):
+            self._subscribe(websocket, session, request, 'proposal_open_contract', self._contract_stream(session, contract_id))
+        return response
+
+    def _on_proposal_open_contract(self, websocket, session, request):
+        contract_id = request.get('contract_id')
+        if contract_id not in session.get('contracts', {}):
+            return self._error(request, 'proposal_open_contract', "ContractNotFound", "Contract not found.")
+        if not request.get('subscribe'):
+            return self._reply(request, 'proposal_open_contract', {'contract_id': contract_id, 'is_sold': 0, 'status': 'open'})
+        self._subscribe(websocket, session, request, 'proposal_open_contract', self._contract_stream(session, contract_id))
+        return None
+
+    async def _contract_stream(self, session, contract_id):
+        contract = session['contracts'][contract_id]
+        parameters = contract['parameters']
+        symbol = parameters.get('symbol', BASE_SYMBOLS[0])
+        duration = parameters.get('duration', 5)
+        entry = self._spots.get(symbol, 1000.0)
+        ticks = duration if parameters.get('duration_unit') == 't' else max(int(duration / max(self._tick_interval, 1e-3)), 1)
+        spot = entry
+        for _ in range(ticks):
+            await asyncio.sleep(self._tick_interval)
+            spot = self._next_quote(symbol)
+            yield {'contract_id': contract_id, 'entry_spot': entry, 'current_spot': spot, 'is_sold': 0, 'status': 'open'}
+        rise = parameters.get('contract_type') in ('CALL', 'HIGHER', 'CALLE')
+        won = spot > entry if rise else spot < entry
+        profit = round(contract['payout'] - contract['price'] if won else -contract['price'], 2)
+        if won:
+            session['balance'] += contract['payout']
+        yield {'contract_id': contract_id, 'entry_spot': entry, 'exit_tick': spot, 'is_sold': 1, 'status': 'won' if won else 'lost', 'profit': profit}
+
+    def _on_forget(self, websocket, session, request):
+        task = session['subscriptions'].pop(request.get('forget'), None)
+        if task:
+            task.cancel()
+        return self._reply(request, 'forget', 1 if task else 0)
+
+    def _on_forget_all(self, websocket, session, request):
+        ids = list(session['subscriptions'])
+        for sub_id in ids:
+            session['subscriptions'].pop(sub_id).cancel()
+        return self._reply(request, 'forget_all', ids)
+    #endregion
+
+
+async def main(port=8765, **kwargs):
+    async with FakeDerivServer(port=port, **kwargs) as server:
+        print(f"Servidor Deriv local em {server.url}")
+        await asyncio.Future()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,24 @@
+import logging
+
+
+LOGGER_NAME = "deriv"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# Padrão WARNING: mensagens detalhadas (respostas completas, etapas do robô) ficam desligadas e nem são formatadas.
+logger = logging.getLogger(LOGGER_NAME)
+logger.setLevel(logging.WARNING)
+
+
+def get_logger(name=None):
+    return logger.getChild(name) if name else logger
+
+
+def set_log_level(level):
+    """Ajusta o nível do logger 'deriv' ('DEBUG', 'INFO', logging.WARNING...) e instala um handler no stderr se faltar."""
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(handler)
+    logger.setLevel(level)
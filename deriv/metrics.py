@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime
+from pathlib import Path
+from log import get_logger
+
+
+logger = get_logger("metrics")
+
+
+METRICS_FILE = Path(Path(__file__).parent, "..", "logs", "metrics.json")
+
+# Limites superiores (ms) dos buckets do histograma, em escala geométrica x1.1 (0.1ms a ~90s).
+BUCKET_BOUNDS_MS = tuple(round(0.1 * 1.1 ** i, 3) for i in range(144))
+
+
+class LatencyHistogram:
+
+    def __init__(self):
+        self._counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._min = None
+        self._max = None
+
+    def record(self, latency_ms: float):
+        self._counts[bisect_left(BUCKET_BOUNDS_MS, latency_ms)] += 1
+        self._count += 1
+        self._total += latency_ms
+        self._min = latency_ms if self._min is None else min(self._min, latency_ms)
+        self._max = latency_ms if self._max is None else max(self._max, latency_ms)
+
+    def percentile(self, q: float):
+        if not self._count:
+            return None
+        rank = q / 100 * self._count
+        acc = 0
+        for index, count in enumerate(self._counts):
+            if count and acc + count >= rank:
+                # Interpolação linear dentro do bucket, limitada pelos extremos observados.
+                lower = max(BUCKET_BOUNDS_MS[index - 1] if index else 0.0, self._min)
+                upper = min(BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self._max, self._max)
+                return lower + (upper - lower) * (rank - acc) / count
+            acc += count
+        return self._max
+
+    @property
+    def count(self):
+        return self._count
+
+    def snapshot(self):
+        return {
+            'count': self._count,
+            'mean_ms': self._total / self._count if self._count else None,
+            'min_ms': self._min,
+            'max_ms': self._max,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+        }
+
+
+class ConnMetrics:
+
+    def __init__(self, path=METRICS_FILE):
+        self._path = Path(path)
+        self._latency = {}
+        # Falhas ficam num histograma à parte: um erro de conexão após segundos não distorce o p99 das respostas.
+        self._error_latency = {}
+        self._errors = {}
+        self._timeouts = {}
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._started = datetime.now()
+        self._exporter = None
+
+    #region ConnMetrics_Record
+    @staticmethod
+    def msg_type(msg):
+        # Nas requisições Deriv o nome do método é a primeira chave da mensagem.
+        return next(iter(msg), 'unknown') if isinstance(msg, dict) else 'unknown'
+
+    def request_started(self):
+        self._in_flight += 1
+        self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def request_finished(self, msg_type, latency_ms, *, error=False, timeout=False):
+        self._in_flight = max(self._in_flight - 1, 0)
+        if timeout:
+            self._timeouts[msg_type] = self._timeouts.get(msg_type, 0) + 1
+            return
+        if error:
+            self._errors[msg_type] = self._errors.get(msg_type, 0) + 1
+            self._error_latency.setdefault(msg_type, LatencyHistogram()).record(latency_ms)
+            return
+        self._latency.setdefault(msg_type, LatencyHistogram()).record(latency_ms)
+
+    def reset(self):
+        self._latency.clear()
+        self._error_latency.clear()
+        self._errors.clear()
+        self._timeouts.clear()
+        self._max_in_flight = self._in_flight
+        self._started = datetime.now()
+    #endregion
+
+    #region ConnMetrics_Export
+    def snapshot(self):
+        msg_types = sorted(set(self._latency) | set(self._errors) | set(self._timeouts))
+        return {
+            'since': self._started.isoformat(timespec='seconds'),
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'in_flight': self._in_flight,
+            'max_in_flight': self._max_in_flight,
+            'requests': {
+                msg_type: {
+                    **(self._latency[msg_type].snapshot() if msg_type in self._latency else LatencyHistogram().snapshot()),
+                    'errors': self._errors.get(msg_type, 0),
+                    'timeouts': self._timeouts.get(msg_type, 0),
+                    'error_latency': self._error_latency[msg_type].snapshot() if msg_type in self._error_latency else None,
+                } for msg_type in msg_types
+            },
+        }
+
+    def export(self, path=None):
+        path = Path(path) if path else self._path
+        if not path.parent.exists():
+            os.makedirs(path.parent)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_exporter(self, interval=60.0):
+        if self._exporter and not self._exporter.done():
+            return self._exporter
+        self._exporter = asyncio.get_running_loop().create_task(self._export_loop(interval))
+        return self._exporter
+
+    async def stop_exporter(self):
+        if self._exporter and not self._exporter.done():
+            self._exporter.cancel()
+            try:
+                await self._exporter
+            except asyncio.CancelledError:
+                pass
+        self._exporter = None
+        self._try_export()
+
+    async def _export_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self._try_export()
+
+    def _try_export(self):
+        try:
+            self.export()
+        except OSError as e:
+            logger.error("Falha ao exportar métricas para '%s': %s", self._path, e)
+    #endregion
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        self._path = Path(value)
@@ -0,0 +1,187 @@
+import csv
+import os
+import time
+import numpy as np
+
+
+JOURNAL_FILE = os.path.join(os.path.dirname(__file__), '../logs/journal.csv')
+
+
+class OutcomeModel:
+    """Gera retornos por unidade de stake (+payout na vitória, -1 na derrota) em blocos 2-D (trades x caminhos)."""
+
+    def __init__(self, *, win_probability=None, payout=0.95, empirical=None):
+        if empirical is None and win_probability is None:
+            raise ValueError('Informe win_probability/payout ou retornos empíricos.')
+        self._win_probability = win_probability
+        self._payout = payout
+        self._empirical = None if empirical is None else np.asarray(empirical, dtype=np.float64)
+        if self._empirical is not None and not len(self._empirical):
+            raise ValueError('Lista de retornos empíricos vazia.')
+
+    @classmethod
+    def from_journal(cls, path=JOURNAL_FILE, *, stake=1.0):
+        """Bootstrap dos resultados do journal; Profit é convertido em retorno por unidade de stake."""
+        returns = []
+        with open(path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    returns.append(float(row['Profit']) / stake)
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return cls(empirical=returns)
+
+    def sample(self, rng, shape):
+        if self._empirical is not None:
+            return self._empirical[rng.integers(0, len(self._empirical), size=shape)]
+        return np.where(rng.random(shape) < self._win_probability, self._payout, -1.0)
+
+    @property
+    def expected_return(self):
+        if self._empirical is not None:
+            return float(self._empirical.mean())
+        return self._win_probability * self._payout - (1 - self._win_probability)
+
+
+class Politica:
+    """
+    Política de stake vetorizada: recebe o estado de todos os caminhos e devolve o próximo stake.
+    `active` marca os caminhos que operam neste trade; estado interno só avança neles.
+    """
+
+    def reset(self, n_paths, base):
+        pass
+
+    def new_session(self, active):
+        """Início de sessão para os caminhos em `active`."""
+        pass
+
+    def stake(self, balance, last_return, active):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{k}={v}' for k, v in vars(self).items() if not k.startswith('_'))})"
+
+
+class StakeFixo(Politica):
+    def __init__(self, stake=1.0):
+        self.base = stake
+
+    def stake(self, balance, last_return, active):
+        return np.full(len(balance), self.base)
+
+
+class FracaoFixa(Politica):
+    def __init__(self, fraction=0.02, min_stake=0.35):
+        self.fraction = fraction
+        self.min_stake = min_stake
+
+    def stake(self, balance, last_return, active):
+        return np.maximum(balance * self.fraction, self.min_stake)
+
+
+class Martingale(Politica):
+    """Multiplica o stake após derrota (anti=False) ou após vitória (anti=True), até max_steps; cada sessão começa na base."""
+
+    def __init__(self, base=1.0, multiplier=2.0, max_steps=6, anti=False):
+        self.base = base
+        self.multiplier = multiplier
+        self.max_steps = max_steps
+        self.anti = anti
+        self._steps = None
+
+    def reset(self, n_paths, base):
+        self._steps = np.zeros(n_paths, dtype=np.int16)
+
+    def new_session(self, active):
+        self._steps[active] = 0
+
+    def stake(self, balance, last_return, active):
+        escalate = (last_return > 0) if self.anti else (last_return < 0)
+        # Caminhos parados por stop-loss/stop-gain ficam com a progressão congelada.
+        self._steps = np.where(active, np.where(escalate & (self._steps < self.max_steps), self._steps + 1, 0), self._steps)
+        return self.base * self.multiplier ** self._steps.astype(np.float64)
+
+
+class AntiMartingale(Martingale):
+    def __init__(self, base=1.0, multiplier=2.0, max_steps=3):
+        super().__init__(base=base, multiplier=multiplier, max_steps=max_steps, anti=True)
+
+
+def simulate(politica, model, *, n_paths=100000, n_trades=500, initial_balance=100.0, min_stake=0.35,
+             trades_per_session=None, stop_loss=None, stop_gain=None, seed=None, chunk=64):
+    """
+    Simula n_paths sequências de n_trades sob a política. Em cada sessão (trades_per_session trades) o
+    caminho para ao perder stop_loss ou ganhar stop_gain desde o início da sessão. Ruína = saldo < min_stake.
+    """
+    rng = np.random.default_rng(seed)
+    balance = np.full(n_paths, float(initial_balance))
+    peak = balance.copy()
+    max_drawdown = np.zeros(n_paths)
+    last_return = np.zeros(n_paths)
+    ruined = np.zeros(n_paths, dtype=bool)
+    session_start = balance.copy()
+    session_active = np.ones(n_paths, dtype=bool)
+    trades_done = np.zeros(n_paths, dtype=np.int32)
+    session_length = trades_per_session or n_trades
+    politica.reset(n_paths, initial_balance)
+
+    started = time.perf_counter()
+    stake = np.empty(n_paths)
+    result = np.empty(n_paths)
+    drawdown = np.empty(n_paths)
+    for block_start in range(0, n_trades, chunk):
+        # Bloco (trades x caminhos): cada linha é contígua para as operações por trade.
+        block = model.sample(rng, (min(chunk, n_trades - block_start), n_paths))
+        for row, outcome in enumerate(block):
+            step = block_start + row
+            if step and step % session_length == 0:
+                session_start = balance.copy()
+                session_active = ~ruined
+                # A sessão nova não herda o resultado do último trade da anterior.
+                last_return[session_active] = 0.0
+                politica.new_session(session_active)
+            active = session_active & ~ruined
+            np.minimum(politica.stake(balance, last_return, active), balance, out=stake)
+            np.multiply(outcome, active, out=result)
+            balance += stake * result
+            np.copyto(last_return, result, where=active)
+            trades_done += active
+            ruined |= balance < min_stake
+            np.maximum(peak, balance, out=peak)
+            np.subtract(peak, balance, out=drawdown)
+            drawdown /= peak
+            np.maximum(max_drawdown, drawdown, out=max_drawdown)
+            if stop_loss is not None:
+                session_active &= balance > session_start - stop_loss
+            if stop_gain is not None:
+                session_active &= balance < session_start + stop_gain
+    elapsed = time.perf_counter() - started
+
+    growth = np.log(np.maximum(balance, 1e-12) / initial_balance)
+    return {
+        'politica': repr(politica),
+        'paths': n_paths,
+        'trades': n_trades,
+        'seconds': elapsed,
+        'ruin_probability': float(ruined.mean()),
+        'profit_probability': float((balance > initial_balance).mean()),
+        'final_balance_mean': float(balance.mean()),
+        'final_balance_percentiles': dict(zip(('p5', 'p25', 'p50', 'p75', 'p95'), np.percentile(balance, [5, 25, 50, 75, 95]).tolist())),
+        'max_drawdown_percentiles': dict(zip(('p50', 'p90', 'p99'), np.percentile(max_drawdown, [50, 90, 99]).tolist())),
+        'expected_log_growth_per_trade': float(growth.mean() / max(trades_done.mean(), 1)),
+        'trades_mean': float(trades_done.mean()),
+    }
+
+
+def sweep(politicas, model, **kwargs):
+    return [simulate(politica, model, **kwargs) for politica in politicas]
+
+
+if __name__ == '__main__':
+    model = OutcomeModel(win_probability=0.53, payout=0.95)
+    politicas = [StakeFixo(1.0), FracaoFixa(0.02), Martingale(1.0), AntiMartingale(1.0)]
+    for report in sweep(politicas, model, n_paths=200000, n_trades=500, trades_per_session=50, stop_loss=10, stop_gain=10, seed=0):
+        print(f"{report['politica']:<60} ruína={report['ruin_probability']:.4f} lucro={report['profit_probability']:.3f} "
+              f"saldo_p50={report['final_balance_percentiles']['p50']:.2f} dd_p90={report['max_drawdown_percentiles']['p90']:.3f} "
+              f"g={report['expected_log_growth_per_trade']:.5f} ({report['seconds']:.2f}s)")
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from connection import AppDashboard, ConnManager, Connector
+from metrics import METRICS_FILE
+from symbol import Asset, ActiveSymbol, populate
+from symbol_columns import SymbolColumns
+import request as req
+from log import get_logger
+
+
+logger = get_logger("multi_account")
+
+
+# Dados compartilhados anexados no processo worker (somente leitura); ver shared_columns() e shared_ticks().
+_shared = {}
+
+
+def get_accounts(app_name=None):
+    """Lista (app_name, token_name) para cada token do knv.csv, usando o primeiro app se nenhum for indicado."""
+    key_names = AppDashboard.get_key_names()
+    apps = key_names.get('app') or []
+    tokens = key_names.get('token') or []
+    app_name = app_name or (apps[0] if apps else None)
+    if not app_name or not tokens:
+        raise ValueError(f'app_name:{app_name} ou tokens:{tokens} inválidos no CSV.')
+    return [(app_name, token_name) for token_name in tokens]
+
+
+async def fetch_registry(app_name, token_name):
+    conn = ConnManager(app_name=app_name, token_name=token_name)
+    await conn.connect()
+    try:
+        resp_asset_index = await conn.send_request(req.ASSET_INDEX)
+        resp_active_symbols = await conn.send_request(req.ACTIVE_SYMBOLS)
+    finally:
+        await conn.disconnect()
+    if not (resp_asset_index and resp_active_symbols):
+        raise ValueError('Não foi possível obter asset_index/active_symbols para o registro compartilhado.')
+    return {'asset_index': resp_asset_index.get('asset_index'), 'active_symbols': resp_active_symbols.get('active_symbols')}
+
+
+class SharedRegistry:
+    """Payload do registro (asset_index + active_symbols) publicado uma vez em memória compartilhada, somente leitura nos workers."""
+
+    def __init__(self, payload):
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        self._shm = SharedMemory(create=True, size=max(len(data), 1))
+        self._shm.buf[:len(data)] = data
+        self._size = len(data)
+
+    @property
+    def handle(self):
+        return self._shm.name, self._size
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    @staticmethod
+    def load(handle):
+        name, size = handle
+        # Os workers spawn herdam o resource_tracker do pai, que continua dono do bloco (unlink em close()).
+        shm = SharedMemory(name=name)
+        try:
+            return json.loads(bytes(shm.buf[:size]).decode('utf-8'))
+        finally:
+            shm.close()
+
+
+class SharedTicks:
+    """
+    Anel de ticks por symbol em memória compartilhada: o processo pai grava (único escritor) o stream
+    de ticks e os workers leem sem assinar o mesmo stream em cada conta. counts[i] é o total já gravado
+    no symbol i; a leitura confere o contador depois da cópia para descartar posições sobrescritas.
+    """
+
+    def __init__(self, symbols, capacity=4096, *, handle=None):
+        self._symbols = list(symbols)
+        self._index = {symbol: i for i, symbol in enumerate(self._symbols)}
+        self._capacity = capacity
+        n = len(self._symbols)
+        if handle is None:
+            self._shm = SharedMemory(create=True, size=max(8 * n * (1 + 2 * capacity), 1))
+            self._owner = True
+        else:
+            self._shm = SharedMemory(name=handle['name'])
+            self._owner = False
+        self._counts = np.ndarray((n,), dtype=np.int64, buffer=self._shm.buf)
+        self._epochs = np.ndarray((n, capacity), dtype=np.int64, buffer=self._shm.buf, offset=8 * n)
+        self._quotes = np.ndarray((n, capacity), dtype=np.float64, buffer=self._shm.buf, offset=8 * n * (1 + capacity))
+        if self._owner:
+            self._counts[:] = 0
+        else:
+            for arr in (self._counts, self._epochs, self._quotes):
+                arr.flags.writeable = False
+
+    @classmethod
+    def attach(cls, handle):
+        return cls(handle['symbols'], handle['capacity'], handle=handle)
+
+    @property
+    def handle(self):
+        return {'name': self._shm.name, 'symbols': self._symbols, 'capacity': self._capacity}
+
+    def write(self, symbol, epoch, quote):
+        i = self._index[symbol]
+        count = int(self._counts[i])
+        position = count % self._capacity
+        self._epochs[i, position] = epoch
+        self._quotes[i, position] = quote
+        # O contador só avança depois dos valores: quem lê nunca vê uma posição pela metade.
+        self._counts[i] = count + 1
+
+    def on_tick_message(self, message):
+        tick = message['tick']
+        if tick['symbol'] in self._index:
+            self.write(tick['symbol'], tick['epoch'], tick['quote'])
+
+    def tail(self, symbol, n=None):
+        """Cópia dos últimos n ticks (epochs, quotes), do mais antigo para o mais recente."""
+        i = self._index[symbol]
+        while True:
+            count = int(self._counts[i])
+            size = min(n or self._capacity, count, self._capacity)
+            positions = np.arange(count - size, count) % self._capacity
+            epochs = self._epochs[i, positions]
+            quotes = self._quotes[i, positions]
+            if int(self._counts[i]) - (count - size) <= self._capacity:
+                return epochs, quotes
+
+    def count(self, symbol):
+        return int(self._counts[self._index[symbol]])
+
+    @property
+    def symbols(self):
+        return list(self._symbols)
+
+    def close(self):
+        self._counts = self._epochs = self._quotes = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def shared_columns():
+    """SymbolColumns publicado pelo MultiAccountRunner (None fora de um worker ou com share_registry=False)."""
+    return _shared.get('columns')
+
+
+def shared_ticks():
+    """SharedTicks alimentado pelo processo pai (None se o runner não recebeu tick_symbols)."""
+    return _shared.get('ticks')
+
+
+def _run_account(worker, app_name, token_name, handles, endpoint):
+    if endpoint:
+        Connector.set_endpoint(endpoint)
+    if handles.get('registry'):
+        registry = SharedRegistry.load(handles['registry'])
+        Asset.clear()
+        ActiveSymbol.clear()
+        populate(lst_active_symbols=registry['active_symbols'], lst_asset_index=registry['asset_index'])
+    if handles.get('columns'):
+        _shared['columns'] = SymbolColumns.attach(handles['columns'])
+    if handles.get('ticks'):
+        _shared['ticks'] = SharedTicks.attach(handles['ticks'])
+
+    async def run():
+        conn = ConnManager(app_name=app_name, token_name=token_name)
+        conn.metrics.path = METRICS_FILE.with_name(f"metrics_{token_name}.json")
+        await conn.connect()
+        if conn.user_account is None:
+            raise ConnectionError(f'Falha ao autenticar a conta {token_name}.')
+        try:
+            return await worker(conn)
+        finally:
+            await conn.disconnect()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        for shared in _shared.values():
+            shared.close()
+        _shared.clear()
+
+
+class MultiAccountRunner:
+    """
+    Executa uma corrotina worker(conn_manager) por conta do knv.csv, cada conta num processo próprio
+    (os singletons de conexão valem por processo). O registro de symbols é baixado uma vez e publicado
+    em memória compartilhada (payload para o populate e colunas SymbolColumns); com `tick_symbols`, o pai
+    assina os ticks uma única vez e os grava num SharedTicks lido pelos workers.
+    """
+
+    def __init__(self, worker, *, accounts=None, processes=None, share_registry=True, endpoint=None,
+                 tick_symbols=None, tick_capacity=4096):
+        self._worker = worker
+        self._endpoint = endpoint
+        self._accounts = accounts or get_accounts()
+        self._processes = min(processes or multiprocessing.cpu_count(), len(self._accounts))
+        self._share_registry = share_registry
+        self._tick_symbols = list(tick_symbols or [])
+        self._tick_capacity = tick_capacity
+
+    def run(self):
+        if self._endpoint:
+            Connector.set_endpoint(self._endpoint)
+        registry = columns = ticks = None
+        handles = {}
+        try:
+            if self._share_registry:
+                payload = asyncio.run(fetch_registry(*self._accounts[0]))
+                registry = SharedRegistry(payload)
+                handles['registry'] = registry.handle
+                Asset.clear()
+                ActiveSymbol.clear()
+                populate(lst_active_symbols=payload['active_symbols'], lst_asset_index=payload['asset_index'])
+                columns, handles['columns'] = SymbolColumns.from_registry().to_shared_memory()
+            if self._tick_symbols:
+                ticks = SharedTicks(self._tick_symbols, self._tick_capacity)
+                handles['ticks'] = ticks.handle
+                return asyncio.run(self._run_with_feed(ticks, handles))
+            return self._run_pool(handles)
+        finally:
+            if registry:
+                registry.close()
+            if columns:
+                columns.close(unlink=True)
+            if ticks:
+                ticks.close()
+
+    async def _run_with_feed(self, ticks, handles):
+        conn = ConnManager(app_name=self._accounts[0][0], token_name=self._accounts[0][1])
+        await conn.connect()
+        try:
+            for symbol in ticks.symbols:
+                await conn.subscribe_ticks(symbol, ticks.on_tick_message)
+            return await asyncio.get_running_loop().run_in_executor(None, self._run_pool, handles)
+        finally:
+            await conn.disconnect()
+
+    def _run_pool(self, handles):
+        results = {}
+        # spawn + maxtasksperchild=1: cada conta ganha um processo limpo, sem singletons herdados.
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(self._processes, maxtasksperchild=1) as pool:
+            pending = {
+                token_name: pool.apply_async(_run_account, (self._worker, app_name, token_name, handles, self._endpoint))
+                for app_name, token_name in self._accounts
+            }
+            for token_name, result in pending.items():
+                try:
+                    results[token_name] = result.get()
+                except Exception as e:
+                    logger.error("Erro no worker da conta %s: %s", token_name, e)
+                    results[token_name] = e
+        return results
+
+    @property
+    def accounts(self):
+        return self._accounts
+
+
+async def balance_worker(conn):
+    await conn.update_balance()
+    account = conn.user_account
+    return {'loginid': account.loginid, 'balance': account.balance, 'currency': account.currency, 'symbols': len(ActiveSymbol.get_available_symbols())}
+
+
+if __name__ == '__main__':
+    for token_name, result in MultiAccountRunner(balance_worker).run().items():
+        print(f"{token_name}: {result}")
@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import gzip
+import heapq
+import itertools
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from websockets.exceptions import ConnectionClosedOK
+
+
+TRAFFIC_DIR = Path(Path(__file__).parent, "..", "logs", "traffic")
+
+OUTBOUND = '>'
+INBOUND = '<'
+SESSION = '#'
+
+# O log é feito para ser compartilhado: o token e os dados pessoais do authorize nunca são gravados.
+REDACTED = '<redacted>'
+AUTHORIZE_MARKER = '"authorize"'
+AUTHORIZE_PII = ('email', 'fullname', 'loginid', 'user_id')
+
+
+def redact(message):
+    """Remove o token de requisições authorize (inclusive no echo_req) e os dados pessoais da resposta."""
+    if isinstance(message.get('authorize'), str):
+        message['authorize'] = REDACTED
+    if isinstance(message.get('echo_req'), dict):
+        redact(message['echo_req'])
+    account = message.get('authorize')
+    if isinstance(account, dict):
+        for field in AUTHORIZE_PII:
+            if field in account:
+                account[field] = REDACTED
+        for item in account.get('account_list') or []:
+            if isinstance(item, dict) and 'loginid' in item:
+                item['loginid'] = REDACTED
+    return message
+
+
+class TrafficRecorder:
+    """
+    Grava toda mensagem enviada/recebida com timestamp monotônico num log gzip append-only.
+    Cada linha: '<t>\\t<direção>\\t<json>'; cada conexão abre uma sessão com uma linha '#'.
+    """
+
+    def __init__(self, path=None, flush_every=256):
+        if path is None:
+            path = Path(TRAFFIC_DIR, f"{datetime.now():%Y%m%d}.log.gz")
+        self._path = Path(path)
+        self._flush_every = flush_every
+        self._pending = 0
+        self._file = None
+
+    def open_session(self):
+        if self._file is None:
+            if not self._path.parent.exists():
+                os.makedirs(self._path.parent)
+            self._file = gzip.open(self._path, 'at', encoding='utf-8')
+        self._write(SESSION, datetime.now().isoformat())
+        self.flush()
+
+    def record(self, direction, raw):
+        if self._file is None:
+            self.open_session()
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        if AUTHORIZE_MARKER in raw:
+            raw = json.dumps(redact(json.loads(raw)))
+        # Quebras de linha fora de strings JSON são apenas espaço em branco.
+        self._write(direction, raw.replace('\n', ' '))
+        self._pending += 1
+        if self._pending >= self._flush_every:
+            self.flush()
+
+    def _write(self, direction, text):
+        self._file.write(f"{time.monotonic():.6f}\t{direction}\t{text}\n")
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+        self._pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._pending = 0
+
+    def wrap(self, connection):
+        self.open_session()
+        return RecordingConnection(connection, self)
+
+    @property
+    def path(self):
+        return self._path
+
+
+class RecordingConnection:
+
+    def __init__(self, connection, recorder):
+        self._connection = connection
+        self._recorder = recorder
+
+    async def send(self, message):
+        self._recorder.record(OUTBOUND, message)
+        await self._connection.send(message)
+
+    async def recv(self):
+        message = await self._connection.recv()
+        self._recorder.record(INBOUND, message)
+        return message
+
+    async def close(self, *args, **kwargs):
+        try:
+            await self._connection.close(*args, **kwargs)
+        finally:
+            self._recorder.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def load_sessions(path):
+    """Lê o log e devolve uma lista de sessões, cada uma com a lista [(t, direção, mensagem)]."""
+    sessions = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                t, direction, text = line.rstrip('\n').split('\t', 2)
+                if direction == SESSION:
+                    sessions.append([])
+                elif sessions:
+                    sessions[-1].append((float(t), direction, json.loads(text)))
+        except (EOFError, ValueError):
+            # Log interrompido no meio de um bloco (ex.: processo morto): mantém o que foi lido.
+            pass
+    return sessions
+
+
+class ReplayConnection:
+    """
+    Conexão que reproduz uma sessão gravada. Cada requisição enviada é casada com a próxima
+    requisição gravada do mesmo método, e as respostas/streams gravados para ela são reentregues
+    com o req_id atual, respeitando os intervalos originais divididos por speed (None = máximo).
+    """
+
+    def __init__(self, records, speed=1.0):
+        self._speed = speed if speed and speed > 0 else None
+        self._requests = {}
+        self._inbound = {}
+        for t, direction, message in records:
+            if direction == OUTBOUND:
+                method = next((key for key in message if key != 'req_id'), None)
+                self._requests.setdefault(method, deque()).append((t, message.get('req_id')))
+            elif direction == INBOUND and message.get('req_id') is not None:
+                self._inbound.setdefault(message['req_id'], []).append((t, message))
+        self._heap = []
+        self._seq = itertools.count()
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._matched = 0
+        self._missed = 0
+        self._pump = asyncio.get_running_loop().create_task(self._run_pump())
+
+    #region ReplayConnection_WebSocket
+    async def send(self, message):
+        if self._closed:
+            raise ConnectionClosedOK(None, None)
+        request = json.loads(message)
+        method = next((key for key in request if key != 'req_id'), None)
+        recorded = self._requests.get(method)
+        if not recorded:
+            self._missed += 1
+            self._queue.put_nowait(json.dumps({
+                'echo_req': request, 'msg_type': method, 'req_id': request.get('req_id'),
+                'error': {'code': 'ReplayMiss', 'message': f"Nenhuma requisição '{method}' restante na gravação."}}))
+            return
+        self._matched += 1
+        t_request, old_req_id = recorded.popleft()
+        now = asyncio.get_running_loop().time()
+        for t, response in self._inbound.pop(old_req_id, []):
+            due = t if self._speed is None else now + (t - t_request) / self._speed
+            heapq.heappush(self._heap, (due, next(self._seq), request.get('req_id'), response))
+        self._wakeup.set()
+
+    async def recv(self):
+        message = await self._queue.get()
+        if message is None:
+            raise ConnectionClosedOK(None, None)
+        return message
+
+    async def close(self, *args, **kwargs):
+        if self._closed:
+            return
+        self._closed = True
+        self._pump.cancel()
+        self._queue.put_nowait(None)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def open(self):
+        return not self._closed
+    #endregion
+
+    async def _run_pump(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            due, _, req_id, response = self._heap[0]
+            if self._speed is not None and due > loop.time():
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), due - loop.time())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            replayed = {**response, 'req_id': req_id}
+            if isinstance(response.get('echo_req'), dict):
+                # Como no servidor real, o echo_req repete o req_id da requisição atual.
+                replayed['echo_req'] = {**response['echo_req'], 'req_id': req_id}
+            self._queue.put_nowait(json.dumps(replayed))
+            if self._speed is None:
+                # Em velocidade máxima cede o loop a cada mensagem para o consumidor reagir na mesma ordem da gravação.
+                await asyncio.sleep(0)
+
+    @property
+    def drained(self):
+        return not self._heap and self._queue.empty() and not any(self._requests.values())
+
+    @property
+    def stats(self):
+        return {'matched': self._matched, 'missed': self._missed, 'pending': len(self._heap),
+                'remaining_requests': sum(len(v) for v in self._requests.values())}
+
+
+class Replayer:
+    """Fábrica de conexões para Connector.set_connection_factory a partir de uma sessão gravada."""
+
+    def __init__(self, path, *, speed=1.0, session=-1):
+        self._path = Path(path)
+        self._speed = speed
+        self._session = session
+        self._records = None
+        self._connection = None
+
+    async def connect(self, url=None, **kwargs):
+        if self._records is None:
+            sessions = load_sessions(self._path)
+            if not sessions:
+                raise ValueError(f"Nenhuma sessão encontrada em '{self._path}'.")
+            self._records = sessions[self._session]
+        self._connection = ReplayConnection(self._records, speed=self._speed)
+        return self._connection
+
+    @property
+    def connection(self):
+        return self._connection
+
+
+def summary(path):
+    for index, records in enumerate(load_sessions(path)):
+        if not records:
+            continue
+        counts = {}
+        for _, direction, message in records:
+            key = message.get('msg_type') if direction == INBOUND else next((k for k in message if k != 'req_id'), None)
+            counts[(direction, key)] = counts.get((direction, key), 0) + 1
+        print(f"Sessão {index}: {len(records)} mensagens em {records[-1][0] - records[0][0]:.1f}s")
+        for (direction, key), count in sorted(counts.items(), key=lambda x: (x[0][0], str(x[0][1]))):
+            print(f"  {direction} {key:<28} {count}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Resumo de um log de tráfego gravado.")
+    parser.add_argument('path')
+    summary(parser.parse_args().path)
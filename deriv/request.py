@@ -1,3 +1,6 @@
 BALANCE = {"balance": 1}
 ASSET_INDEX = {"asset_index": 1}
-ACTIVE_SYMBOLS = {"active_symbols": "brief", "product_type": "basic"}
\ No newline at end of file
+ACTIVE_SYMBOLS = {"active_symbols": "brief", "product_type": "basic"}
+TRADING_TIMES = {"trading_times": "today"}
+CONTRACTS_FOR = {"contracts_for": "R_10", "currency": "USD", "product_type": "basic"}
+TICKS_HISTORY = {"ticks_history": "R_10", "end": "latest", "count": 5000, "style": "ticks"}
@@ -0,0 +1,125 @@
+import json
+import re
+import numpy as np
+from log import get_logger
+from util import SeriesBuffer
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import ujson
+        json_loads = ujson.loads
+        JSON_BACKEND = "ujson"
+    except ImportError:
+        json_loads = json.loads
+        JSON_BACKEND = "json"
+
+
+logger = get_logger("router")
+
+# Só mensagens de stream trazem o campo subscription; as demais seguem intactas (sem decodificar) para o DerivAPI.
+SUBSCRIPTION_MARKER = '"subscription"'
+# O id é lido do texto bruto: streams sem rota nunca são decodificados aqui.
+SUBSCRIPTION_ID = re.compile(r'"subscription"\s*:\s*\{\s*"id"\s*:\s*"([^"]+)"')
+
+
+class TickBuffer:
+    """Ticks de um symbol em dois SeriesBuffer pré-alocados (epoch int64, quote float64); `tail` devolve views sem cópia."""
+
+    def __init__(self, capacity=4096):
+        self._epochs = SeriesBuffer(capacity, dtype=np.int64)
+        self._quotes = SeriesBuffer(capacity)
+        self._count = 0
+
+    def write(self, epoch, quote):
+        self._epochs.append(epoch)
+        self._quotes.append(quote)
+        self._count += 1
+
+    def tail(self, n=None):
+        n = n or len(self._quotes)
+        return self._epochs.tail(n), self._quotes.tail(n)
+
+    def __len__(self):
+        return len(self._quotes)
+
+    @property
+    def last(self):
+        if not self._count:
+            return None, np.nan
+        return int(self._epochs.last), float(self._quotes.last)
+
+    @property
+    def count(self):
+        return self._count
+
+
+class RoutingConnection:
+    """
+    Envolve a conexão websocket antes do DerivAPI: mensagens de stream com subscription.id (ou req_id) roteado
+    vão direto ao handler, decodificadas com o parser JSON mais rápido disponível, sem passar pelos Subjects
+    do DerivAPI. A primeira resposta de cada assinatura também segue para o DerivAPI, para resolver o `send`.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._by_subscription = {}
+        self._by_req_id = {}
+        self._routed = 0
+
+    def route(self, req_id, handler):
+        self._by_req_id[req_id] = handler
+
+    def unroute(self, subscription_id=None, req_id=None):
+        self._by_req_id.pop(req_id, None)
+        return self._by_subscription.pop(subscription_id, None)
+
+    async def send(self, message):
+        await self._connection.send(message)
+
+    async def recv(self):
+        while True:
+            raw = await self._connection.recv()
+            if SUBSCRIPTION_MARKER not in raw or not (self._by_subscription or self._by_req_id):
+                return raw
+            match = SUBSCRIPTION_ID.search(raw)
+            if match is None:
+                return raw
+            subscription_id = match.group(1)
+            handler = self._by_subscription.get(subscription_id)
+            if handler is not None:
+                self._dispatch(handler, json_loads(raw))
+                continue
+            if self._by_req_id:
+                # Primeira mensagem de uma assinatura nova (uma vez por assinatura): o req_id de nível superior só é
+                # confiável decodificando, pois o echo_req também traz um req_id e costuma vir antes no texto.
+                message = json_loads(raw)
+                handler = self._by_req_id.pop(message.get('req_id'), None)
+                if handler is not None:
+                    self._by_subscription[subscription_id] = handler
+                    self._dispatch(handler, message)
+            return raw
+
+    def _dispatch(self, handler, message):
+        self._routed += 1
+        try:
+            handler(message)
+        except Exception:
+            logger.exception("Erro no handler da assinatura %s", message.get('subscription', {}).get('id'))
+
+    async def close(self, *args, **kwargs):
+        await self._connection.close(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    @property
+    def subscriptions(self):
+        return list(self._by_subscription)
+
+    @property
+    def routed(self):
+        return self._routed
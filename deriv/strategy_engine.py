@@ -0,0 +1,263 @@
+import asyncio
+import numpy as np
+import talib
+from talib import abstract
+from tracing import Tracer
+from util import SeriesBuffer
+
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+
+# Amostras extras para indicadores com período instável (EMA, RSI...) convergirem ao valor com histórico completo.
+UNSTABLE_WARMUP = 200
+
+
+class IndicatorNode:
+
+    def __init__(self, key, funcao, parametros, saida, fonte):
+        self.key = key
+        self.funcao = getattr(talib, funcao)
+        self.parametros = parametros
+        self.saida = saida
+        self.fonte = fonte  # nome de série de preço ou chave de outro nó
+        function = abstract.Function(funcao, **parametros)
+        self.lookback = function.lookback
+        self.warmup = 3 * self.lookback + (UNSTABLE_WARMUP if 'Function has an unstable period' in function.info['function_flags'] else 0)
+        self.span = 1
+        self.values = np.empty(0)
+        self.consumers = set()
+
+    def compute(self, inputs):
+        if not len(inputs) or np.isnan(inputs).all():
+            # Sem dados válidos ainda (aquecimento); o TA-Lib recusa entradas só com NaN.
+            self.values = np.full(len(inputs), np.nan)
+            return self.values
+        result = self.funcao(inputs, **self.parametros)
+        self.values = result[self.saida] if isinstance(result, (tuple, list)) else result
+        return self.values
+
+
+class SymbolGraph:
+    """Grafo de indicadores deduplicado de um (symbol, timeframe), alimentado por ticks agregados em candles."""
+
+    def __init__(self, symbol, timeframe, capacity):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.capacity = capacity
+        self.series = {field: SeriesBuffer(capacity) for field in PRICE_FIELDS}
+        self.epochs = SeriesBuffer(capacity)
+        self.nodes = {}
+        self.order = []
+        self.bindings = []
+        self._bucket = None
+
+    def add_dependency(self, dep):
+        key = dep.key
+        if key in self.nodes:
+            return key
+        fonte = self.add_dependency(dep.fonte) if hasattr(dep.fonte, 'key') else dep.fonte
+        node = IndicatorNode(key, dep.funcao, dep.parametros, dep.saida, fonte)
+        self.nodes[key] = node
+        if fonte in self.nodes:
+            self.nodes[fonte].consumers.add(key)
+        self._rebuild()
+        return key
+
+    def _rebuild(self):
+        # Ordem topológica (fontes antes dos consumidores) e janela necessária por nó, das folhas para as raízes.
+        order, visited = [], set()
+
+        def visit(key):
+            if key in visited:
+                return
+            visited.add(key)
+            fonte = self.nodes[key].fonte
+            if fonte in self.nodes:
+                visit(fonte)
+            order.append(key)
+
+        for key in self.nodes:
+            visit(key)
+        self.order = order
+        for key in reversed(order):
+            node = self.nodes[key]
+            consumer_span = max((self.nodes[c].span for c in node.consumers), default=1)
+            node.span = consumer_span + node.warmup
+        self.capacity = max(self.capacity, max((self.nodes[k].span + 1 for k in self.order if self.nodes[k].fonte in PRICE_FIELDS), default=1))
+        for buffer in list(self.series.values()) + [self.epochs]:
+            buffer.resize(self.capacity)
+
+    def on_tick(self, epoch, quote):
+        """Agrega o tick; devolve True quando há candle novo/fechado para avaliar (timeframe 0 = todo tick)."""
+        if not self.timeframe:
+            self._append(epoch, quote, quote, quote, quote)
+            return True
+        bucket = epoch - epoch % self.timeframe
+        if bucket != self._bucket:
+            closed = self._bucket is not None
+            self._bucket = bucket
+            self._append(bucket, quote, quote, quote, quote)
+            # O candle anterior fechou: avalia com ele ainda como último completo.
+            return closed
+        high = self.series['high']
+        low = self.series['low']
+        high.set_last(max(high.last, quote))
+        low.set_last(min(low.last, quote))
+        self.series['close'].set_last(quote)
+        return False
+
+    def load(self, epochs, quotes):
+        """Aquece os buffers com ticks históricos (ex.: fatia do TickArchive), agregando candles de forma vetorizada."""
+        epochs = np.asarray(epochs)
+        quotes = np.asarray(quotes, dtype=np.float64)
+        if not len(epochs):
+            return 0
+        if not self.timeframe:
+            self.epochs.extend(epochs)
+            for field in PRICE_FIELDS:
+                self.series[field].extend(quotes)
+            return len(epochs)
+        buckets = epochs - epochs % self.timeframe
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(quotes)] - 1
+        self.epochs.extend(buckets[starts])
+        self.series['open'].extend(quotes[starts])
+        self.series['high'].extend(np.maximum.reduceat(quotes, starts))
+        self.series['low'].extend(np.minimum.reduceat(quotes, starts))
+        self.series['close'].extend(quotes[ends])
+        # O último candle continua aberto para os próximos ticks ao vivo.
+        self._bucket = int(buckets[-1])
+        return len(starts)
+
+    def _append(self, epoch, open_, high, low, close):
+        self.epochs.append(epoch)
+        for field, value in zip(PRICE_FIELDS, (open_, high, low, close)):
+            self.series[field].append(value)
+
+    def evaluate(self):
+        completed = 0 if not self.timeframe else 1  # Com candles, o último ainda está aberto.
+        for key in self.order:
+            node = self.nodes[key]
+            if node.fonte in PRICE_FIELDS:
+                data = self.series[node.fonte].tail(node.span + completed)
+                inputs = data[:len(data) - completed] if completed else data
+            else:
+                inputs = self.nodes[node.fonte].values[-node.span:]
+            node.compute(inputs)
+        return len(self.order)
+
+    def last_value(self, key):
+        values = self.nodes[key].values
+        return values[-1] if len(values) else np.nan
+
+    def last_price(self):
+        close = self.series['close']
+        if not self.timeframe:
+            return close.last
+        data = close.tail(2)
+        return data[0] if len(data) == 2 else np.nan
+
+
+class StrategyEngine:
+    """
+    Avalia muitas estratégias por tick compartilhando os indicadores: cada (symbol, timeframe) tem um
+    grafo deduplicado, recalculado só quando um tick/candle desse grafo chega; os sinais vão para os DerivedBot ligados.
+    """
+
+    def __init__(self, *, capacity=512, archive=None):
+        self._capacity = capacity
+        self._archive = archive
+        self._graphs = {}
+        self._by_symbol = {}
+        self._computations = 0
+        self._running = {}
+
+    def register(self, strategy, symbol, *, timeframe=0, bots=()):
+        graph = self._graphs.get((symbol, timeframe))
+        if graph is None:
+            graph = SymbolGraph(symbol, timeframe, self._capacity)
+            self._graphs[(symbol, timeframe)] = graph
+            self._by_symbol.setdefault(symbol, []).append(graph)
+        aliases = {alias: graph.add_dependency(dep) for alias, dep in strategy.dependencias.items()}
+        graph.bindings.append((strategy, aliases, list(bots)))
+        for bot in bots:
+            bot.symbol = symbol
+        return graph
+
+    def unregister(self, strategy):
+        for graph in self._graphs.values():
+            graph.bindings = [binding for binding in graph.bindings if binding[0] is not strategy]
+
+    def on_tick(self, symbol, epoch, quote):
+        """Processa um tick; devolve a lista de (strategy, sinal) emitidos."""
+        if self._archive is not None:
+            self._archive.append_tick(symbol, epoch, quote)
+        signals = []
+        flow = Tracer.new_flow()
+        Tracer.instant("tick", cat="engine", track=symbol, flow=flow, epoch=epoch, quote=quote)
+        for graph in self._by_symbol.get(symbol, ()):
+            if not graph.on_tick(epoch, quote):
+                continue
+            with Tracer.span("indicators", cat="engine", track=symbol, flow=flow, timeframe=graph.timeframe):
+                self._computations += graph.evaluate()
+            price = graph.last_price()
+            with Tracer.span("signal", cat="engine", track=symbol, flow=flow, timeframe=graph.timeframe):
+                for strategy, aliases, bots in graph.bindings:
+                    signal = strategy.sinal({alias: graph.last_value(key) for alias, key in aliases.items()}, price)
+                    if signal:
+                        signals.append((strategy, signal))
+                        self.dispatch(signal, bots, flow)
+        return signals
+
+    def on_tick_message(self, message):
+        tick = message.get('tick') if isinstance(message, dict) else None
+        if tick:
+            return self.on_tick(tick['symbol'], tick['epoch'], tick['quote'])
+        return []
+
+    def warm_up(self, archive=None, symbols=None):
+        """Carrega dos ticks arquivados o histórico que cada grafo precisa, sem baixar ticks_history após reiniciar."""
+        archive = archive or self._archive
+        loaded = {}
+        for (symbol, timeframe), graph in self._graphs.items():
+            if symbols is not None and symbol not in symbols:
+                continue
+            series = archive.series(symbol)
+            if series.last_epoch is None:
+                continue
+            if timeframe:
+                data = series.read(start=series.last_epoch - series.last_epoch % timeframe - graph.capacity * timeframe)
+            else:
+                data = series.tail(graph.capacity)
+            loaded[(symbol, timeframe)] = graph.load(data['epoch'], data['quote'])
+        return loaded
+
+    def dispatch(self, signal, bots, flow=None):
+        if not bots or signal not in ('rise', 'fall'):
+            return
+        loop = asyncio.get_event_loop()
+        for bot in bots:
+            task = self._running.get(bot.id)
+            # bot.running só vira True dentro de run(); a task pendente evita disparos duplicados até lá.
+            if bot.running or (task and not task.done()):
+                continue
+            bot.contract_type = signal
+            bot.trace_flow = flow
+            task = loop.create_task(bot.run())
+            task.add_done_callback(self._consume)
+            self._running[bot.id] = task
+
+    @staticmethod
+    def _consume(task):
+        # O robô já registra a falha no log; consumir a exceção evita o "Task exception was never retrieved".
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def stats(self):
+        return {
+            'graphs': len(self._graphs),
+            'strategies': sum(len(graph.bindings) for graph in self._graphs.values()),
+            'indicators': sum(len(graph.nodes) for graph in self._graphs.values()),
+            'computations': self._computations,
+        }
@@ -2,7 +2,7 @@ import asyncio
 import re
 from functools import reduce
 from pprint import pprint as pp
-from util import check_str
+from util import check_str, memoize_query
 from connection import ConnManager, AppDashboard
 import request as req
 
@@ -11,7 +11,7 @@ def line(value: str):
     print(ln)
     result = eval(value)
 
-    if isinstance(result, list):
+    if isinstance(result, (list, tuple)):
         ln = len(result)
         print(f'{value} - show {5 if ln >=5 else ln} from: {ln}\n')
         pp(result[:5])
@@ -21,6 +21,7 @@ def line(value: str):
 
 class Asset:
     _instances = []
+    _version = 0  # Incrementado a cada mutação do registro; invalida as consultas memoizadas.
 
     def __new__(cls, *, group, modality, digit_min, unit_min, digit_max, unit_max):
         if (not check_str(group)) or (not check_str(modality)):
@@ -81,6 +82,7 @@ class Asset:
             instance._str_repr = srt_repr
             instance._has_duration = has_duration
             cls._instances.append(instance)
+            cls._version += 1
 
         return instance
 
@@ -116,6 +118,7 @@ class Asset:
     @classmethod
     def clear(cls):
         cls._instances.clear()
+        cls._version += 1
         
     @classmethod
     def find(cls, value, only_key=True):
@@ -136,41 +139,48 @@ class Asset:
             return insts
 
     @classmethod
+    @memoize_query(lambda: Asset._version)
     def get_all(cls):
-        return sorted(cls._instances, key=lambda x: x._key)
+        return tuple(sorted(cls._instances, key=lambda x: x._key))
     
     @classmethod
+    @memoize_query(lambda: Asset._version)
     def get_all_keys(cls):
-        return [inst._key for inst in sorted(cls._instances, key=lambda x: x._key)]
+        return tuple(inst._key for inst in cls.get_all())
 
     @classmethod
+    @memoize_query(lambda: Asset._version)
     def get_by_group(cls, group, *, restrict=False):
         pattern = re.compile(group, flags=re.I)
-        return sorted([inst for inst in cls._instances if (pattern.search(inst._group) if not restrict else pattern.fullmatch(inst._group))], key=lambda x: x._key)
+        return tuple(inst for inst in cls.get_all() if (pattern.search(inst._group) if not restrict else pattern.fullmatch(inst._group)))
 
     @classmethod
+    @memoize_query(lambda: Asset._version)
     def get_by_modality(cls, modality, *, restrict=False):
         pattern = re.compile(modality, flags=re.I)
-        return sorted([inst for inst in cls._instances if (pattern.search(inst.modality) if not restrict else pattern.fullmatch(inst.modality))], key=lambda x: x._key)
+        return tuple(inst for inst in cls.get_all() if (pattern.search(inst.modality) if not restrict else pattern.fullmatch(inst.modality)))
 
     @classmethod
+    @memoize_query(lambda: Asset._version)
     def get_by_duration(cls, *, digit, unit, fit_in_units=True):
         drt_info = cls.get_info_duration(digit=digit, unit=unit)
         if drt_info:
             if fit_in_units:
-                instances = [inst for inst in cls._instances if inst._has_duration and inst._index_min == inst._index_max == drt_info.get('index') and inst._digit_min <= drt_info.get('digit') <= inst._digit_max]
+                instances = [inst for inst in cls.get_all() if inst._has_duration and inst._index_min == inst._index_max == drt_info.get('index') and inst._digit_min <= drt_info.get('digit') <= inst._digit_max]
             else:
-                instances = [inst for inst in cls._instances if inst._has_duration and inst._key_min <= drt_info.get('key') <= inst._key_max]
-            return sorted(instances, key=lambda x: x._key)
-        return []
+                instances = [inst for inst in cls.get_all() if inst._has_duration and inst._key_min <= drt_info.get('key') <= inst._key_max]
+            return tuple(instances)
+        return ()
 
     @classmethod
+    @memoize_query(lambda: Asset._version)
     def get_groups(cls):
-        return sorted({inst._group for inst in cls._instances})
+        return tuple(sorted({inst._group for inst in cls._instances}))
 
     @classmethod
+    @memoize_query(lambda: Asset._version)
     def get_modalities(cls):
-        return sorted({inst._modality for inst in cls._instances})
+        return tuple(sorted({inst._modality for inst in cls._instances}))
     #endregion
 
     #region TradeParameter_Static
@@ -203,14 +213,15 @@ class Asset:
 
 class ActiveSymbol:
     _instances = []
+    _version = 0  # Incrementado a cada mutação do registro; invalida as consultas memoizadas.
 
     def __new__(cls, *, symbol, display_name, assets, exchange_is_open, is_trading_suspended, market, market_display_name, sub_market, submarket_display_name):
         if not check_str(symbol):
             raise ValueError(f'String(s) inválida(s) ou nula(s) para symbol:{symbol}')
         
-        key = f'{not is_trading_suspended}{not exchange_is_open}{market}{sub_market}{symbol}'
+        key = cls.get_key(symbol=symbol, exchange_is_open=exchange_is_open, is_trading_suspended=is_trading_suspended, market=market, sub_market=sub_market)
         instance = cls.find(key=key)
-        srt_repr = f'{market_display_name if market_display_name else "":<16} {submarket_display_name if submarket_display_name else "":<19} {display_name}{"(XX)" if is_trading_suspended else ""} {"" if exchange_is_open else " — closed":>10}'
+        srt_repr = cls.get_str_repr(display_name=display_name, exchange_is_open=exchange_is_open, is_trading_suspended=is_trading_suspended, market_display_name=market_display_name, submarket_display_name=submarket_display_name)
         
         if not instance:
             instance = super().__new__(cls)
@@ -226,6 +237,7 @@ class ActiveSymbol:
             instance._key = key
             instance._str_repr = srt_repr
             cls._instances.append(instance)
+            cls._version += 1
         
         return instance
 
@@ -270,12 +282,31 @@ class ActiveSymbol:
     
     def __iter__(self):
         return iter(self._assets)
+
+    def set_exchange_is_open(self, exchange_is_open):
+        if self._exchange_is_open == exchange_is_open:
+            return
+        self._exchange_is_open = exchange_is_open
+        self._key = self.get_key(symbol=self._symbol, exchange_is_open=exchange_is_open, is_trading_suspended=self._is_trading_suspended, market=self._market, sub_market=self._sub_market)
+        self._str_repr = self.get_str_repr(display_name=self._display_name, exchange_is_open=exchange_is_open, is_trading_suspended=self._is_trading_suspended, market_display_name=self._market_display_name, submarket_display_name=self._submarket_display_name)
+        ActiveSymbol._version += 1
+    #endregion
+
+    #region ActiveSymbol_Static
+    @staticmethod
+    def get_key(*, symbol, exchange_is_open, is_trading_suspended, market, sub_market):
+        return f'{not is_trading_suspended}{not exchange_is_open}{market}{sub_market}{symbol}'
+
+    @staticmethod
+    def get_str_repr(*, display_name, exchange_is_open, is_trading_suspended, market_display_name, submarket_display_name):
+        return f'{market_display_name if market_display_name else "":<16} {submarket_display_name if submarket_display_name else "":<19} {display_name}{"(XX)" if is_trading_suspended else ""} {"" if exchange_is_open else " — closed":>10}'
     #endregion
 
     #region ActiveSymbol_ClassMembers
     @classmethod
     def clear(cls):
         cls._instances.clear()
+        cls._version += 1
 
     @classmethod
     def find(cls, **kwargs):
@@ -346,22 +377,25 @@ class ActiveSymbol:
             return instances
 
     @classmethod
+    @memoize_query(lambda: ActiveSymbol._version)
     def get_available_symbols(cls):
-        return sorted([inst for inst in cls._instances if (inst._exchange_is_open and not inst._is_trading_suspended)], key=lambda x: x._key)
+        return tuple(sorted([inst for inst in cls._instances if (inst._exchange_is_open and not inst._is_trading_suspended)], key=lambda x: x._key))
     
     @classmethod
     def get_assets_by_symbol(cls, symbol):
         return [[inst, inst._assets] for inst in cls._instances if inst._symbol == symbol]
 
     @classmethod
+    @memoize_query(lambda: (Asset._version, ActiveSymbol._version))
     def filter_symbols_by_type(cls, contract_type, restrict=False):
-        keys_from_assets = [asset_index.key for asset_index in Asset.get_by_modality(modality=contract_type, restrict=restrict)]
-        return [[inst, [asset for asset in inst if asset.key in keys_from_assets]] for inst in cls._instances if any(asset.key in keys_from_assets for asset in inst)]
+        keys_from_assets = {asset_index.key for asset_index in Asset.get_by_modality(modality=contract_type, restrict=restrict)}
+        return tuple((inst, tuple(asset for asset in inst if asset.key in keys_from_assets)) for inst in cls._instances if any(asset.key in keys_from_assets for asset in inst))
 
     @classmethod
+    @memoize_query(lambda: (Asset._version, ActiveSymbol._version))
     def get_symbols_by_duration(cls, digit, unit, fit_in_units=True):
-        keys_from_assets = [asset_index.key for asset_index in Asset.get_by_duration(digit=digit, unit=unit, fit_in_units=fit_in_units)]
-        return [[inst, [asset for asset in inst if asset.key in keys_from_assets]] for inst in cls._instances if any(asset.key in keys_from_assets for asset in inst)]
+        keys_from_assets = {asset_index.key for asset_index in Asset.get_by_duration(digit=digit, unit=unit, fit_in_units=fit_in_units)}
+        return tuple((inst, tuple(asset for asset in inst if asset.key in keys_from_assets)) for inst in cls._instances if any(asset.key in keys_from_assets for asset in inst))
     #endregion
 
 def populate(*, lst_active_symbols, lst_asset_index):
@@ -0,0 +1,194 @@
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from symbol import Asset, ActiveSymbol
+from util import memoize_query
+
+
+SYMBOL_DTYPE = np.dtype([
+    ('symbol', 'U32'),
+    ('market', 'i2'),
+    ('sub_market', 'i2'),
+    ('exchange_is_open', '?'),
+    ('is_trading_suspended', '?'),
+])
+
+# min_key/max_key seguem Asset._key_min/_key_max como inteiro: índice da unidade * 100000 + dígitos (-1 = sem duração).
+ASSET_DTYPE = np.dtype([
+    ('group', 'i2'),
+    ('modality', 'i2'),
+    ('min_key', 'i8'),
+    ('max_key', 'i8'),
+])
+
+DURATION_BASE = 100000
+
+
+def _codes(values):
+    names = sorted({value for value in values if value is not None})
+    index = {name: code for code, name in enumerate(names)}
+    return names, [index.get(value, -1) for value in values]
+
+
+class SymbolColumns:
+    """
+    Visão colunar do registro (ActiveSymbol + Asset) para triagem vetorizada com máscaras NumPy.
+    membership[i, j] indica se o symbol i oferece o asset j. Os arrays são somente leitura e
+    podem ser publicados em memória compartilhada para os workers sem serialização.
+    """
+
+    def __init__(self, *, symbols, assets, membership, markets, sub_markets, groups, modalities, asset_keys, shm=None):
+        self._symbols = symbols
+        self._assets = assets
+        self._membership = membership
+        self._markets = markets
+        self._sub_markets = sub_markets
+        self._groups = groups
+        self._modalities = modalities
+        self._asset_keys = asset_keys
+        self._shm = shm
+        for arr in (symbols, assets, membership):
+            arr.flags.writeable = False
+
+    #region SymbolColumns_Build
+    @classmethod
+    @memoize_query(lambda: (Asset._version, ActiveSymbol._version), maxsize=1)
+    def from_registry(cls):
+        instances = ActiveSymbol.find()
+        all_assets = Asset.get_all()
+        asset_keys = [asset.key for asset in all_assets]
+        asset_index = {key: column for column, key in enumerate(asset_keys)}
+
+        markets, market_codes = _codes([inst.market for inst in instances])
+        sub_markets, sub_market_codes = _codes([inst.sub_market for inst in instances])
+        symbols = np.empty(len(instances), dtype=SYMBOL_DTYPE)
+        symbols['symbol'] = [inst.symbol for inst in instances]
+        symbols['market'] = market_codes
+        symbols['sub_market'] = sub_market_codes
+        symbols['exchange_is_open'] = [bool(inst.exchange_is_open) for inst in instances]
+        symbols['is_trading_suspended'] = [bool(inst.is_trading_suspended) for inst in instances]
+
+        groups, group_codes = _codes([asset.group for asset in all_assets])
+        modalities, modality_codes = _codes([asset.modality for asset in all_assets])
+        assets = np.empty(len(all_assets), dtype=ASSET_DTYPE)
+        assets['group'] = group_codes
+        assets['modality'] = modality_codes
+        assets['min_key'] = [int(asset._key_min) if asset._key_min else -1 for asset in all_assets]
+        assets['max_key'] = [int(asset._key_max) if asset._key_max else -1 for asset in all_assets]
+
+        membership = np.zeros((len(instances), len(all_assets)), dtype=bool)
+        for row, inst in enumerate(instances):
+            membership[row, [asset_index[asset.key] for asset in inst if asset.key in asset_index]] = True
+
+        return cls(symbols=symbols, assets=assets, membership=membership, markets=markets, sub_markets=sub_markets,
+                   groups=groups, modalities=modalities, asset_keys=asset_keys)
+    #endregion
+
+    #region SymbolColumns_Screening
+    def asset_mask(self, *, group=None, modality=None, digit=None, unit=None, fit_in_units=True):
+        mask = np.ones(len(self._assets), dtype=bool)
+        if group is not None:
+            mask &= np.isin(self._assets['group'], [code for code, name in enumerate(self._groups) if name == group])
+        if modality is not None:
+            mask &= np.isin(self._assets['modality'], [code for code, name in enumerate(self._modalities) if name == modality])
+        if digit is not None or unit is not None:
+            key = int(Asset.get_info_duration(digit=digit, unit=unit)['key'])
+            min_key = self._assets['min_key']
+            max_key = self._assets['max_key']
+            mask &= (min_key >= 0) & (min_key <= key) & (key <= max_key)
+            if fit_in_units:
+                mask &= (min_key // DURATION_BASE == key // DURATION_BASE) & (max_key // DURATION_BASE == key // DURATION_BASE)
+        return mask
+
+    def mask(self, *, market=None, sub_market=None, exchange_is_open=None, is_trading_suspended=None, **asset_filters):
+        """Máscara de symbols; filtros de asset (group, modality, digit, unit, fit_in_units) exigem ao menos um asset compatível."""
+        mask = np.ones(len(self._symbols), dtype=bool)
+        if market is not None:
+            mask &= self._symbols['market'] == (self._markets.index(market) if market in self._markets else -2)
+        if sub_market is not None:
+            mask &= self._symbols['sub_market'] == (self._sub_markets.index(sub_market) if sub_market in self._sub_markets else -2)
+        if exchange_is_open is not None:
+            mask &= self._symbols['exchange_is_open'] == exchange_is_open
+        if is_trading_suspended is not None:
+            mask &= self._symbols['is_trading_suspended'] == is_trading_suspended
+        if asset_filters:
+            mask &= self._membership[:, self.asset_mask(**asset_filters)].any(axis=1)
+        return mask
+
+    def select(self, mask=None, **filters):
+        if mask is None:
+            mask = self.mask(**filters)
+        return self._symbols['symbol'][mask]
+    #endregion
+
+    #region SymbolColumns_SharedMemory
+    def to_shared_memory(self):
+        """Copia as colunas para um único bloco de memória compartilhada; devolve (SymbolColumns no bloco, handle)."""
+        arrays = {'symbols': self._symbols, 'assets': self._assets, 'membership': self._membership}
+        layout = []
+        offset = 0
+        for name, arr in arrays.items():
+            offset = (offset + 63) // 64 * 64
+            layout.append((name, arr.dtype.descr if arr.dtype.names else arr.dtype.str, arr.shape, offset))
+            offset += arr.nbytes
+        shm = SharedMemory(create=True, size=max(offset, 1))
+        for (name, descr, shape, start), arr in zip(layout, arrays.values()):
+            np.ndarray(shape, dtype=np.dtype(descr), buffer=shm.buf, offset=start)[...] = arr
+        handle = {
+            'name': shm.name, 'layout': layout, 'markets': self._markets, 'sub_markets': self._sub_markets,
+            'groups': self._groups, 'modalities': self._modalities, 'asset_keys': self._asset_keys,
+        }
+        return self._from_buffer(shm, handle), handle
+
+    @classmethod
+    def attach(cls, handle):
+        return cls._from_buffer(SharedMemory(name=handle['name']), handle)
+
+    @classmethod
+    def _from_buffer(cls, shm, handle):
+        arrays = {name: np.ndarray(tuple(shape), dtype=np.dtype(descr if isinstance(descr, str) else [tuple(field) for field in descr]), buffer=shm.buf, offset=offset)
+                  for name, descr, shape, offset in handle['layout']}
+        return cls(symbols=arrays['symbols'], assets=arrays['assets'], membership=arrays['membership'],
+                   markets=list(handle['markets']), sub_markets=list(handle['sub_markets']), groups=list(handle['groups']),
+                   modalities=list(handle['modalities']), asset_keys=list(handle['asset_keys']), shm=shm)
+
+    def close(self, unlink=False):
+        if self._shm is None:
+            return
+        self._symbols = self._assets = self._membership = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+    #endregion
+
+    @property
+    def symbols(self):
+        return self._symbols
+
+    @property
+    def assets(self):
+        return self._assets
+
+    @property
+    def membership(self):
+        return self._membership
+
+    @property
+    def markets(self):
+        return self._markets
+
+    @property
+    def sub_markets(self):
+        return self._sub_markets
+
+    @property
+    def groups(self):
+        return self._groups
+
+    @property
+    def modalities(self):
+        return self._modalities
+
+    @property
+    def asset_keys(self):
+        return self._asset_keys
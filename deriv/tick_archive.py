@@ -0,0 +1,231 @@
+import os
+from pathlib import Path
+import numpy as np
+
+
+ARCHIVE_DIR = Path(Path(__file__).parent, "..", "data", "archive")
+
+# Uma entrada no índice esparso a cada INDEX_STRIDE linhas: a busca por tempo toca só um bloco do arquivo de epochs.
+INDEX_STRIDE = 1024
+
+TICK_FIELDS = ('quote',)
+CANDLE_FIELDS = ('open', 'high', 'low', 'close')
+
+
+class SymbolSeries:
+    """
+    Série de um symbol em disco: um arquivo binário de largura fixa por coluna (epoch int64 e preços float64),
+    só com append e epochs estritamente crescentes. As leituras são fatias np.memmap, sem cópia.
+    """
+
+    def __init__(self, path, fields, *, flush_every=256):
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._fields = fields
+        self._columns = {'epoch': np.dtype('<i8'), **{field: np.dtype('<f8') for field in fields}}
+        self._flush_every = flush_every
+        self._pending = []
+        self._maps = {}
+        self._maps_rows = -1
+        self._rows = self._repair()
+        self._index = self._load_index()
+        self._last_epoch = int(self._read_row(self._rows - 1)) if self._rows else None
+
+    #region SymbolSeries_Files
+    def _file(self, column):
+        return Path(self._path, f"{column}.bin")
+
+    def _repair(self):
+        # Após uma queda no meio do append as colunas podem ter tamanhos diferentes: corta todas no menor.
+        sizes = {}
+        for column, dtype in self._columns.items():
+            file = self._file(column)
+            file.touch(exist_ok=True)
+            sizes[column] = file.stat().st_size // dtype.itemsize
+        rows = min(sizes.values())
+        for column, dtype in self._columns.items():
+            if self._file(column).stat().st_size != rows * dtype.itemsize:
+                os.truncate(self._file(column), rows * dtype.itemsize)
+        return rows
+
+    def _read_row(self, row):
+        with open(self._file('epoch'), 'rb') as f:
+            f.seek(row * 8)
+            return np.frombuffer(f.read(8), dtype='<i8')[0]
+
+    def _load_index(self):
+        file = Path(self._path, "epoch.idx")
+        expected = (self._rows + INDEX_STRIDE - 1) // INDEX_STRIDE
+        index = np.fromfile(file, dtype='<i8') if file.exists() else np.empty(0, dtype='<i8')
+        if len(index) != expected:
+            index = np.array(self._map('epoch')[::INDEX_STRIDE]) if self._rows else np.empty(0, dtype='<i8')
+            index.astype('<i8').tofile(file)
+        return index
+
+    def _map(self, column):
+        if self._maps_rows != self._rows:
+            # O memmap tem tamanho fixo: é recriado quando o arquivo cresce (fatias antigas continuam válidas).
+            self._maps = {}
+            self._maps_rows = self._rows
+        if column not in self._maps:
+            if not self._rows:
+                return np.empty(0, dtype=self._columns[column])
+            self._maps[column] = np.memmap(self._file(column), dtype=self._columns[column], mode='r', shape=(self._rows,))
+        return self._maps[column]
+    #endregion
+
+    #region SymbolSeries_Write
+    def append(self, epoch, *values):
+        self._pending.append((epoch, *values))
+        if len(self._pending) >= self._flush_every:
+            self.flush()
+
+    def extend(self, epochs, **columns):
+        """Append em bloco; epochs repetidos ou já gravados são descartados."""
+        self.flush()
+        epochs = np.asarray(epochs, dtype='<i8')
+        epochs, first = np.unique(epochs, return_index=True)
+        keep = epochs > self._last_epoch if self._last_epoch is not None else np.ones(len(epochs), dtype=bool)
+        if not keep.any():
+            return 0
+        data = {'epoch': epochs[keep]}
+        for field in self._fields:
+            data[field] = np.asarray(columns[field], dtype='<f8')[first][keep]
+        self._write(data)
+        return int(keep.sum())
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending = np.array(self._pending, dtype=np.float64)
+        self._pending = []
+        epochs = pending[:, 0].astype('<i8')
+        self.extend(epochs, **{field: pending[:, i + 1] for i, field in enumerate(self._fields)})
+
+    def _write(self, data):
+        rows = len(data['epoch'])
+        # Preços antes do epoch: numa queda o epoch é a coluna mais curta e o reparo descarta a linha incompleta.
+        for column in list(self._fields) + ['epoch']:
+            with open(self._file(column), 'ab') as f:
+                f.write(np.ascontiguousarray(data[column], dtype=self._columns[column]).tobytes())
+        first_row = self._rows
+        self._rows += rows
+        self._last_epoch = int(data['epoch'][-1])
+        new_entries = np.arange((first_row + INDEX_STRIDE - 1) // INDEX_STRIDE * INDEX_STRIDE, self._rows, INDEX_STRIDE)
+        if len(new_entries):
+            entries = data['epoch'][new_entries - first_row].astype('<i8')
+            with open(Path(self._path, "epoch.idx"), 'ab') as f:
+                f.write(entries.tobytes())
+            self._index = np.concatenate([self._index, entries])
+    #endregion
+
+    #region SymbolSeries_Read
+    def _search(self, epoch, side):
+        i = int(np.searchsorted(self._index, epoch, side))
+        lo = max(i - 1, 0) * INDEX_STRIDE
+        hi = min(i * INDEX_STRIDE, self._rows)
+        return lo + int(np.searchsorted(self._map('epoch')[lo:hi], epoch, side))
+
+    def rows(self, start=None, end=None):
+        """Intervalo de linhas [first, last) com start <= epoch <= end."""
+        self.flush()
+        first = 0 if start is None else self._search(start, 'left')
+        last = self._rows if end is None else self._search(end, 'right')
+        return first, max(first, last)
+
+    def read(self, start=None, end=None):
+        first, last = self.rows(start, end)
+        return {column: self._map(column)[first:last] for column in self._columns}
+
+    def tail(self, n):
+        self.flush()
+        first = max(self._rows - n, 0)
+        return {column: self._map(column)[first:self._rows] for column in self._columns}
+    #endregion
+
+    def __len__(self):
+        return self._rows + len(self._pending)
+
+    @property
+    def fields(self):
+        return self._fields
+
+    @property
+    def last_epoch(self):
+        if self._pending:
+            return int(self._pending[-1][0])
+        return self._last_epoch
+
+    @property
+    def first_epoch(self):
+        return int(self._index[0]) if len(self._index) else None
+
+
+class TickArchive:
+    """
+    Arquivo de ticks e candles por symbol em `root/<symbol>/ticks` e `root/<symbol>/candles_<granularity>`.
+    `on_tick_message` grava o stream ao vivo; as leituras alimentam Indicador/StrategyEngine sem ticks_history.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR, *, flush_every=256):
+        self._root = Path(root)
+        self._flush_every = flush_every
+        self._series = {}
+
+    def series(self, symbol, granularity=0):
+        key = (symbol, granularity)
+        series = self._series.get(key)
+        if series is None:
+            folder = "ticks" if not granularity else f"candles_{granularity}"
+            series = SymbolSeries(Path(self._root, symbol, folder), TICK_FIELDS if not granularity else CANDLE_FIELDS,
+                                  flush_every=self._flush_every)
+            self._series[key] = series
+        return series
+
+    #region TickArchive_Write
+    def append_tick(self, symbol, epoch, quote):
+        series = self.series(symbol)
+        if series.last_epoch is None or epoch > series.last_epoch:
+            series.append(epoch, quote)
+
+    def append_ticks(self, symbol, epochs, quotes):
+        return self.series(symbol).extend(epochs, quote=quotes)
+
+    def append_candles(self, symbol, granularity, candles):
+        """candles no formato da resposta de ticks_history (lista de dicts com epoch/open/high/low/close)."""
+        return self.series(symbol, granularity).extend(
+            [c['epoch'] for c in candles], **{field: [float(c[field]) for c in candles] for field in CANDLE_FIELDS})
+
+    def on_tick_message(self, message):
+        tick = message.get('tick') if isinstance(message, dict) else None
+        if tick:
+            self.append_tick(tick['symbol'], tick['epoch'], tick['quote'])
+
+    def flush(self):
+        for series in self._series.values():
+            series.flush()
+
+    def close(self):
+        self.flush()
+        self._series.clear()
+    #endregion
+
+    #region TickArchive_Read
+    def read(self, symbol, start=None, end=None, granularity=0):
+        return self.series(symbol, granularity).read(start, end)
+
+    def tail(self, symbol, n, granularity=0):
+        return self.series(symbol, granularity).tail(n)
+
+    def last_epoch(self, symbol, granularity=0):
+        return self.series(symbol, granularity).last_epoch
+
+    def symbols(self):
+        if not self._root.exists():
+            return []
+        return sorted(path.name for path in self._root.iterdir() if path.is_dir())
+    #endregion
+
+    @property
+    def root(self):
+        return self._root
@@ -0,0 +1,195 @@
+import asyncio
+import itertools
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from metrics import LatencyHistogram
+
+
+TRACE_DIR = Path(Path(__file__).parent, "..", "logs", "traces")
+
+
+class _NoopSpan:
+    """Span devolvido com o tracing desligado: um único objeto reutilizado, sem alocação nem relógio."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+
+    __slots__ = ('name', 'cat', 'track', 'flow', 'args', 'start')
+
+    def __init__(self, name, cat, track, flow, args):
+        self.name = name
+        self.cat = cat
+        self.track = track
+        self.flow = flow
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        Tracer._record('X', self.name, self.cat, self.start, end - self.start, self.track, self.flow, self.args)
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+class Tracer:
+    """
+    Tracing opcional do caminho de decisão (tick -> indicadores -> sinal -> proposal -> buy -> confirmação).
+    Desligado, `span` devolve NOOP_SPAN. Ligado, os eventos vão para um buffer limitado em memória e
+    `export` gera um JSON no formato Chrome trace (chrome://tracing, ui.perfetto.dev). Spans com o mesmo
+    `flow` são ligados por setas na exportação.
+    """
+
+    _enabled = False
+    _events = deque()
+    _origin = 0
+    _flows = itertools.count(1)
+    _lag = LatencyHistogram()
+    _lag_sampler = None
+
+    @classmethod
+    def enable(cls, *, max_events=1_000_000):
+        cls._events = deque(maxlen=max_events)
+        cls._origin = time.perf_counter_ns()
+        cls._lag = LatencyHistogram()
+        cls._enabled = True
+
+    @classmethod
+    def disable(cls):
+        cls._enabled = False
+
+    @classmethod
+    def enabled(cls):
+        return cls._enabled
+
+    #region Tracer_Record
+    @classmethod
+    def span(cls, name, *, cat="bot", track="main", flow=None, **args):
+        if not cls._enabled:
+            return NOOP_SPAN
+        return Span(name, cat, track, flow, args)
+
+    @classmethod
+    def instant(cls, name, *, cat="bot", track="main", flow=None, **args):
+        if cls._enabled:
+            cls._record('i', name, cat, time.perf_counter_ns(), 0, track, flow, args)
+
+    @classmethod
+    def counter(cls, name, *, track="main", **values):
+        if cls._enabled:
+            cls._record('C', name, "counter", time.perf_counter_ns(), 0, track, None, values)
+
+    @classmethod
+    def new_flow(cls):
+        """Identificador para ligar os spans de uma mesma decisão; None com o tracing desligado."""
+        return next(cls._flows) if cls._enabled else None
+
+    @classmethod
+    def _record(cls, ph, name, cat, start_ns, dur_ns, track, flow, args):
+        cls._events.append((ph, name, cat, start_ns, dur_ns, track, flow, args))
+    #endregion
+
+    #region Tracer_EventLoopLag
+    @classmethod
+    def start_lag_sampler(cls, interval=0.05):
+        """Mede o atraso do event loop: quanto um sleep(interval) demora além do pedido."""
+        if cls._lag_sampler and not cls._lag_sampler.done():
+            return cls._lag_sampler
+        cls._lag_sampler = asyncio.get_running_loop().create_task(cls._lag_loop(interval))
+        return cls._lag_sampler
+
+    @classmethod
+    async def stop_lag_sampler(cls):
+        if cls._lag_sampler and not cls._lag_sampler.done():
+            cls._lag_sampler.cancel()
+            try:
+                await cls._lag_sampler
+            except asyncio.CancelledError:
+                pass
+        cls._lag_sampler = None
+
+    @classmethod
+    async def _lag_loop(cls, interval):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag_ms = max((time.perf_counter() - started - interval) * 1000, 0.0)
+            if cls._enabled:
+                cls._lag.record(lag_ms)
+                cls.counter("event_loop_lag", track="event_loop", lag_ms=round(lag_ms, 3))
+
+    @classmethod
+    def lag_snapshot(cls):
+        return cls._lag.snapshot()
+    #endregion
+
+    #region Tracer_Export
+    @classmethod
+    def to_chrome_trace(cls):
+        pid = os.getpid()
+        tracks = {}
+        events = []
+        flows = {}
+        for ph, name, cat, start_ns, dur_ns, track, flow, args in list(cls._events):
+            tid = tracks.setdefault(track, len(tracks) + 1)
+            event = {'name': name, 'cat': cat, 'ph': ph, 'ts': (start_ns - cls._origin) / 1000, 'pid': pid, 'tid': tid, 'args': args}
+            if ph == 'X':
+                event['dur'] = dur_ns / 1000
+            elif ph == 'i':
+                event['s'] = 't'
+            if flow is not None:
+                event['args'] = {**args, 'flow': flow}
+                flows.setdefault(flow, []).append(event)
+            events.append(event)
+        for flow, members in flows.items():
+            if len(members) < 2:
+                continue
+            members.sort(key=lambda e: e['ts'])
+            for position, member in enumerate(members):
+                phase = 's' if position == 0 else 'f' if position == len(members) - 1 else 't'
+                events.append({'name': 'decision', 'cat': 'flow', 'ph': phase, 'id': flow, 'bp': 'e',
+                               'ts': member['ts'], 'pid': pid, 'tid': member['tid']})
+        for track, tid in tracks.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': str(track)}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'event_loop_lag': cls.lag_snapshot()}}
+
+    @classmethod
+    def export(cls, path=None):
+        path = Path(path) if path else Path(TRACE_DIR, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cls.to_chrome_trace(), f)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def clear(cls):
+        cls._events.clear()
+    #endregion
+
+    @classmethod
+    def stats(cls):
+        return {'enabled': cls._enabled, 'events': len(cls._events), 'event_loop_lag': cls.lag_snapshot()}
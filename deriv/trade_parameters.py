@@ -1,13 +1,181 @@
 import asyncio
-from deriv.connect import Connection
+import time
+from collections import OrderedDict
+import request as req
+from log import get_logger
+
+
+logger = get_logger("trade_parameters")
+
+
+# Durações em ticks ('t') são comparadas entre si; as demais são convertidas para segundos.
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(value):
+    """'15s' -> ('time', 15); '5t' -> ('tick', 5); None se inválido."""
+    if not value or not isinstance(value, str) or len(value) < 2:
+        return None
+    digit, unit = value[:-1], value[-1]
+    if not digit.isdigit():
+        return None
+    return to_duration(int(digit), unit)
+
+
+def to_duration(duration, unit):
+    if unit == 't':
+        return 'tick', int(duration)
+    if unit in UNIT_SECONDS:
+        return 'time', int(duration) * UNIT_SECONDS[unit]
+    return None
+
+
+class ContractsTable:
+    """Tabela compilada de um contracts_for: (contract_type, tipo de duração) -> [(min, max, barriers)]."""
+
+    def __init__(self, symbol, rules):
+        self._symbol = symbol
+        self._rules = rules
+
+    @classmethod
+    def from_response(cls, symbol, contracts_for):
+        rules = {}
+        for contract in contracts_for.get('available', []):
+            min_duration = parse_duration(contract.get('min_contract_duration'))
+            max_duration = parse_duration(contract.get('max_contract_duration'))
+            if not (min_duration and max_duration):
+                continue
+            # Ticks e tempo nunca se misturam numa mesma regra.
+            kind = min_duration[0]
+            if max_duration[0] != kind:
+                continue
+            rules.setdefault((contract.get('contract_type'), kind), []).append(
+                (min_duration[1], max_duration[1], int(contract.get('barriers') or 0)))
+        for lst in rules.values():
+            lst.sort()
+        return cls(symbol, rules)
+
+    def validate(self, contract_type, duration, duration_unit, barriers=0):
+        drt = to_duration(duration, duration_unit)
+        if drt is None:
+            return False, f'Unidade de duração inválida: {duration_unit}.'
+        kind, value = drt
+        rules = self._rules.get((contract_type, kind))
+        if not rules:
+            if not any(ct == contract_type for ct, _ in self._rules):
+                return False, f'Contrato {contract_type} não disponível para {self._symbol}.'
+            return False, f'Contrato {contract_type} não aceita duração em {duration_unit} para {self._symbol}.'
+        if not any(low <= value <= high for low, high, _ in rules):
+            ranges = ', '.join(f'{low}-{high}' for low, high, _ in rules)
+            return False, f'Duração {duration}{duration_unit} fora dos limites ({ranges} {"ticks" if kind == "tick" else "s"}) de {contract_type} em {self._symbol}.'
+        if not any(low <= value <= high and rule_barriers == barriers for low, high, rule_barriers in rules):
+            return False, f'{contract_type} em {self._symbol} não aceita {barriers} barreira(s) para essa duração.'
+        return True, None
+
+    @property
+    def symbol(self):
+        return self._symbol
+
+    @property
+    def contract_types(self):
+        return sorted({contract_type for contract_type, _ in self._rules})
+
 
 class TradeParameters:
-    def __init__(self):
-        self.conn = Connection()
-
-    async def is_valid_combination(self, market_type, trade_type):
-        """
-        Retorna True por padrão, removendo a verificação temporariamente.
-        """
-        print(f"Verificação de combinação para {market_type} e {trade_type} ignorada por agora.")
-        return True  # Temporariamente assume que a combinação é válida
\ No newline at end of file
+    """
+    Valida combinações (symbol, contract_type, duração, barreiras) localmente contra um cache
+    de contracts_for por symbol, com TTL e despejo LRU; as entradas são renovadas em segundo plano.
+    """
+
+    def __init__(self, conn, *, ttl=3600.0, max_symbols=128, currency="USD"):
+        self.conn = conn
+        self._ttl = ttl
+        self._max_symbols = max_symbols
+        self._currency = currency
+        self._tables = OrderedDict()
+        self._fetching = {}
+        self._refresher = None
+
+    #region TradeParameters_Cache
+    async def get_table(self, symbol):
+        entry = self._tables.get(symbol)
+        if not entry:
+            return await self.fetch(symbol)
+        self._tables.move_to_end(symbol)
+        if time.monotonic() - entry[0] >= self._ttl and symbol not in self._fetching:
+            # Entrada vencida continua servindo enquanto a renovação corre fora do caminho da ordem.
+            asyncio.ensure_future(self.fetch(symbol))
+        return entry[1]
+
+    async def fetch(self, symbol):
+        # Requisições concorrentes para o mesmo symbol compartilham o mesmo round trip.
+        task = self._fetching.get(symbol)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(symbol))
+            self._fetching[symbol] = task
+            task.add_done_callback(lambda _: self._fetching.pop(symbol, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, symbol):
+        response = await self.conn.send_request({**req.CONTRACTS_FOR, "contracts_for": symbol, "currency": self._currency})
+        if not response or 'contracts_for' not in response:
+            entry = self._tables.get(symbol)
+            if entry:
+                logger.warning("Falha ao renovar contracts_for de %s; mantendo tabela anterior.", symbol)
+                return entry[1]
+            return None
+        table = ContractsTable.from_response(symbol, response['contracts_for'])
+        self._tables[symbol] = (time.monotonic(), table)
+        self._tables.move_to_end(symbol)
+        while len(self._tables) > self._max_symbols:
+            self._tables.popitem(last=False)
+        return table
+
+    def start_refresher(self, interval=None):
+        if self._refresher and not self._refresher.done():
+            return self._refresher
+        self._refresher = asyncio.get_running_loop().create_task(self._refresh_loop(interval or self._ttl / 4))
+        return self._refresher
+
+    async def stop_refresher(self):
+        if self._refresher and not self._refresher.done():
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+        self._refresher = None
+
+    async def _refresh_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            # Renova antes de expirar as entradas que venceriam até o próximo ciclo.
+            limit = time.monotonic() - self._ttl + interval
+            for symbol in [symbol for symbol, (fetched_at, _) in self._tables.items() if fetched_at <= limit]:
+                try:
+                    await self.fetch(symbol)
+                except Exception as e:
+                    logger.error("Erro ao renovar contracts_for de %s: %s", symbol, e)
+
+    def clear(self):
+        self._tables.clear()
+    #endregion
+
+    #region TradeParameters_Validation
+    def validate(self, symbol, contract_type, duration, duration_unit, barriers=0):
+        """Validação síncrona só com o cache; devolve (None, motivo) se o symbol não estiver carregado."""
+        entry = self._tables.get(symbol)
+        if not entry:
+            return None, f'contracts_for de {symbol} não está em cache.'
+        return entry[1].validate(contract_type, duration, duration_unit, barriers)
+
+    async def check_combination(self, symbol, contract_type, duration, duration_unit, barriers=0):
+        table = await self.get_table(symbol)
+        if table is None:
+            return False, f'Não foi possível obter contracts_for de {symbol}.'
+        return table.validate(contract_type, duration, duration_unit, barriers)
+
+    async def is_valid_combination(self, symbol, contract_type, duration, duration_unit, barriers=0):
+        valid, _ = await self.check_combination(symbol, contract_type, duration, duration_unit, barriers)
+        return valid
+    #endregion
@@ -1,9 +1,20 @@
 import asyncio
-from deriv.connection import Connection
+from datetime import datetime, timezone
+from log import get_logger
+from tracing import Tracer
+
+
+logger = get_logger("trader_bot")
+
 
 class DerivedBot:
     _bots = []  # Lista estática para rastrear todos os robôs
     _next_id = 0  # Contador para gerar IDs únicos
+    _trading_times = None  # Índice de horários (TradingTimes) compartilhado por todos os robôs
+    _trade_parameters = None  # Cache de contracts_for (TradeParameters) para validar combinações localmente
+    # rise/fall -> contract_type do contracts_for; a proposal é enviada sem barreira.
+    CONTRACT_TYPES = {"rise": "CALL", "fall": "PUT"}
+    BARRIERS = 0
 
     def __init__(self, conn, stake=1.0, duration=0.25, trade_type="higher_lower", contract_type="rise"):
         self.id = DerivedBot._next_id
@@ -15,6 +26,7 @@ class DerivedBot:
         self.contract_type = contract_type
         self.conn = conn
         self.running = False
+        self.trace_flow = None  # Liga os spans deste robô aos do tick/sinal que o disparou (Tracer)
         DerivedBot._bots.append(self)
 
     @classmethod
@@ -27,7 +39,17 @@ class DerivedBot:
     def remove_robot(cls, robot_id):
         """Remove um robô da lista com base no ID."""
         cls._bots = [bot for bot in cls._bots if bot.id != robot_id]
-        print(f"Robô com ID {robot_id} removido.")
+        logger.info("Robô com ID %s removido.", robot_id)
+
+    @classmethod
+    def set_trading_times(cls, trading_times):
+        """Define o índice de horários usado para pular symbols fechados antes da proposal."""
+        cls._trading_times = trading_times
+
+    @classmethod
+    def set_trade_parameters(cls, trade_parameters):
+        """Define o validador de combinações usado antes de cada proposal."""
+        cls._trade_parameters = trade_parameters
 
     @classmethod
     def get_active_robots(cls):
@@ -39,7 +61,11 @@ class DerivedBot:
         self.stake = float(stake)
         self.duration = float(duration)
         self.contract_type = contract_type if contract_type in ["rise", "fall"] else "rise"
-        print(f"Parâmetros atualizados para robô ID {self.id}: stake={self.stake}, duration={self.duration}, contract_type={self.contract_type}")
+        logger.info("Parâmetros atualizados para robô ID %s: stake=%s, duration=%s, contract_type=%s", self.id, self.stake, self.duration, self.contract_type)
+
+    @property
+    def api_contract_type(self):
+        return DerivedBot.CONTRACT_TYPES[self.contract_type]
 
     async def run(self):
         try:
@@ -47,32 +73,50 @@ class DerivedBot:
                 raise ValueError(f"Conexão não está ativa para o robô ID {self.id}.")
             
             self.running = True
-            print(f"Verificando combinação para {self.trade_type} no robô ID {self.id}")
-            if self.trade_type == "higher_lower":
-                print("Verificação de combinação para derived e higher_lower ignorada por agora.")
-            print(f"Combinação válida. Iniciando compra para {self.symbol} no robô ID {self.id}")
+            track = f"bot {self.id}"
+            with Tracer.span("checks", track=track, flow=self.trace_flow, symbol=self.symbol):
+                logger.debug("Verificando combinação para %s no robô ID %s", self.trade_type, self.id)
+                trade_parameters = DerivedBot._trade_parameters
+                if trade_parameters:
+                    valid, reason = await trade_parameters.check_combination(
+                        self.symbol, self.api_contract_type, int(self.duration * 60), "s", DerivedBot.BARRIERS)
+                    if not valid:
+                        raise ValueError(f"Combinação inválida no robô ID {self.id}: {reason}")
+                elif self.trade_type == "higher_lower":
+                    logger.debug("Verificação de combinação para derived e higher_lower ignorada por agora.")
+                trading_times = DerivedBot._trading_times
+                if trading_times and trading_times.is_known(self.symbol) and not trading_times.is_tradable(self.symbol):
+                    next_open = trading_times.next_open(self.symbol)
+                    next_open = datetime.fromtimestamp(next_open, tz=timezone.utc).isoformat() if next_open else "desconhecida"
+                    raise ValueError(f"Mercado fechado para {self.symbol} no robô ID {self.id}. Próxima abertura: {next_open}")
+            logger.debug("Combinação válida. Iniciando compra para %s no robô ID %s", self.symbol, self.id)
 
             proposal_request = {
                 "proposal": 1,
                 "amount": self.stake,
                 "basis": "stake",
-                "contract_type": "HIGHER" if self.contract_type == "rise" else "LOWER",
+                "contract_type": self.api_contract_type,
                 "symbol": self.symbol,
                 "duration": int(self.duration * 60),
                 "duration_unit": "s",
                 "currency": "USD"
             }
-            print(f"Validando contrato com requisição: {proposal_request}")
-            proposal_response = await self.conn.send(proposal_request)
+            logger.debug("Validando contrato com requisição: %s", proposal_request)
+            with Tracer.span("proposal", track=track, flow=self.trace_flow, symbol=self.symbol):
+                proposal_response = await self.conn.send(proposal_request)
             if 'error' in proposal_response:
                 raise ValueError(f"Erro na validação do contrato no robô ID {self.id}: {proposal_response['error']['message']}")
-            print(f"Contrato válido: {proposal_response}")
+            logger.debug("Contrato válido: %s", proposal_response)
 
-            if 'proposal' in proposal_response and isinstance(proposal_response['proposal'], list):
-                contract_details = proposal_response['proposal'][0]
-                expected_contract_type = "HIGHER" if self.contract_type == "rise" else "LOWER"
-                if not contract_details.get('contract_type') == expected_contract_type:
-                    raise ValueError(f"Contract type {contract_details.get('contract_type')} não corresponde ao esperado {expected_contract_type} no robô ID {self.id}")
+            contract_details = proposal_response.get('proposal')
+            if isinstance(contract_details, list):
+                contract_details = contract_details[0] if contract_details else None
+            if isinstance(contract_details, dict):
+                # A API devolve o contract_type apenas no echo_req da proposal.
+                contract_type = contract_details.get('contract_type', proposal_response.get('echo_req', {}).get('contract_type'))
+                expected_contract_type = self.api_contract_type
+                if not contract_type == expected_contract_type:
+                    raise ValueError(f"Contract type {contract_type} não corresponde ao esperado {expected_contract_type} no robô ID {self.id}")
             else:
                 raise ValueError("Resposta da proposal inválida no robô ID {self.id}")
 
@@ -80,7 +124,7 @@ class DerivedBot:
                 "buy": 1,
                 "price": self.stake,
                 "parameters": {
-                    "contract_type": "HIGHER" if self.contract_type == "rise" else "LOWER",
+                    "contract_type": self.api_contract_type,
                     "symbol": self.symbol,
                     "duration": int(self.duration * 60),
                     "duration_unit": "s",
@@ -89,16 +133,20 @@ class DerivedBot:
                     "basis": "stake"
                 }
             }
-            print(f"Tentando comprar contrato: {buy_request['parameters']['contract_type']}, stake={self.stake}, duration={self.duration} minutos no robô ID {self.id}")
-            print(f"Requisição enviada: {buy_request}")
-            response = await self.conn.send(buy_request)
-            print(f"Contrato comprado: {response} no robô ID {self.id}")
+            logger.info("Tentando comprar contrato: %s, stake=%s, duration=%s minutos no robô ID %s", buy_request['parameters']['contract_type'], self.stake, self.duration, self.id)
+            logger.debug("Requisição enviada: %s", buy_request)
+            with Tracer.span("buy", track=track, flow=self.trace_flow, symbol=self.symbol, stake=self.stake):
+                response = await self.conn.send(buy_request)
+            buy = response.get('buy') if isinstance(response, dict) else None
+            Tracer.instant("confirmation", track=track, flow=self.trace_flow,
+                           contract_id=buy.get('contract_id') if isinstance(buy, dict) else None)
+            logger.debug("Contrato comprado: %s no robô ID %s", response, self.id)
         except Exception as e:
-            print(f"Erro ao executar o robô ID {self.id}: {e}")
+            logger.error("Erro ao executar o robô ID %s: %s", self.id, e)
             raise
         finally:
             self.running = False
 
     async def stop(self):
         self.running = False
-        print(f"Parando o robô ID {self.id}...")
\ No newline at end of file
+        logger.info("Parando o robô ID %s...", self.id)
\ No newline at end of file
@@ -0,0 +1,180 @@
+import asyncio
+import calendar
+import json
+import os
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from symbol import ActiveSymbol
+import request as req
+
+
+CACHE_DIR = Path(Path(__file__).parent, "..", "cache", "trading_times")
+
+
+def _parse_day(date):
+    return calendar.timegm(datetime.strptime(date, '%Y-%m-%d').timetuple())
+
+
+def _parse_clock(value):
+    hours, minutes, seconds = (int(part) for part in value.split(':'))
+    return hours * 3600 + minutes * 60 + seconds
+
+
+class TradingTimes:
+    """
+    Índice de horários de negociação por symbol, montado a partir de trading_times (UTC).
+    Cada symbol guarda listas ordenadas de aberturas/fechamentos, consultadas por busca binária.
+    """
+
+    def __init__(self, *, days=2, cache_dir=CACHE_DIR):
+        self._days = days
+        self._cache_dir = Path(cache_dir)
+        self._opens = {}
+        self._closes = {}
+        self._boundaries = []
+        self._loaded_dates = []
+
+    #region TradingTimes_Load
+    @staticmethod
+    def get_dates(days=2, now=None):
+        today = datetime.fromtimestamp(now if now is not None else time.time(), tz=timezone.utc).date()
+        return [(today + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+    async def load(self, conn=None, now=None):
+        """Carrega os próximos `days` dias do cache local, buscando via conn apenas os que faltam."""
+        responses = {}
+        for date in self.get_dates(self._days, now):
+            payload = self.load_cache(date)
+            if payload is None:
+                if conn is None:
+                    raise ValueError(f'trading_times de {date} não está em cache e nenhuma conexão foi informada.')
+                response = await conn.send_request({**req.TRADING_TIMES, "trading_times": date})
+                if not response or 'trading_times' not in response:
+                    raise ValueError(f'Resposta inválida para trading_times de {date}: {response}')
+                payload = response['trading_times']
+                self.save_cache(date, payload)
+            responses[date] = payload
+        self.build(responses)
+        return self
+
+    def load_cache(self, date):
+        path = Path(self._cache_dir, f"{date}.json")
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_cache(self, date, payload):
+        if not self._cache_dir.exists():
+            os.makedirs(self._cache_dir)
+        with open(Path(self._cache_dir, f"{date}.json"), 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+
+    def build(self, responses):
+        intervals = {}
+        for date, payload in sorted(responses.items()):
+            day = _parse_day(date)
+            for market in payload.get('markets', []):
+                for submarket in market.get('submarkets', []):
+                    for sym in submarket.get('symbols', []):
+                        times = sym.get('times') or {}
+                        lst = intervals.setdefault(sym.get('symbol'), [])
+                        for open_at, close_at in zip(times.get('open') or [], times.get('close') or []):
+                            if open_at == '--' or close_at == '--':
+                                continue
+                            start = day + _parse_clock(open_at)
+                            # Intervalo [abertura, fechamento): só 23:59:59 (fim do dia) ganha +1s para emendar com a abertura seguinte.
+                            end = day + _parse_clock(close_at) + (1 if close_at == '23:59:59' else 0)
+                            if end <= start:
+                                end += 86400
+                            lst.append((start, end))
+
+        self._opens.clear()
+        self._closes.clear()
+        boundaries = set()
+        for symbol, lst in intervals.items():
+            merged = []
+            for start, end in sorted(lst):
+                if merged and start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._opens[symbol] = [start for start, _ in merged]
+            self._closes[symbol] = [end for _, end in merged]
+            boundaries.update(self._opens[symbol])
+            boundaries.update(self._closes[symbol])
+        self._boundaries = sorted(boundaries)
+        self._loaded_dates = sorted(responses)
+    #endregion
+
+    #region TradingTimes_Queries
+    def is_known(self, symbol):
+        return symbol in self._opens
+
+    def is_tradable(self, symbol, t=None):
+        opens = self._opens.get(symbol)
+        if not opens:
+            return False
+        t = time.time() if t is None else t
+        index = bisect_right(opens, t) - 1
+        return index >= 0 and t < self._closes[symbol][index]
+
+    def next_open(self, symbol, t=None):
+        """Epoch da próxima abertura (t se já estiver aberto) ou None se não houver no horizonte carregado."""
+        opens = self._opens.get(symbol)
+        if not opens:
+            return None
+        t = time.time() if t is None else t
+        if self.is_tradable(symbol, t):
+            return t
+        index = bisect_right(opens, t)
+        return opens[index] if index < len(opens) else None
+
+    def next_close(self, symbol, t=None):
+        opens = self._opens.get(symbol)
+        if not opens:
+            return None
+        t = time.time() if t is None else t
+        index = bisect_right(opens, t) - 1
+        if index >= 0 and t < self._closes[symbol][index]:
+            return self._closes[symbol][index]
+        return None
+
+    def next_boundary(self, t=None):
+        t = time.time() if t is None else t
+        index = bisect_right(self._boundaries, t)
+        return self._boundaries[index] if index < len(self._boundaries) else None
+    #endregion
+
+    #region TradingTimes_Schedule
+    def refresh_symbols(self, t=None):
+        """Atualiza exchange_is_open dos ActiveSymbol conhecidos pelo índice; devolve os symbols alterados."""
+        t = time.time() if t is None else t
+        changed = []
+        for inst in ActiveSymbol.find():
+            if not self.is_known(inst.symbol):
+                continue
+            is_open = self.is_tradable(inst.symbol, t)
+            if bool(inst.exchange_is_open) != is_open:
+                inst.set_exchange_is_open(1 if is_open else 0)
+                changed.append(inst)
+        return changed
+
+    async def run(self, conn=None):
+        """Mantém os ActiveSymbol em dia: vira o status em cada fronteira e recarrega ao trocar o dia."""
+        while True:
+            now = time.time()
+            if self.get_dates(self._days, now) != self._loaded_dates:
+                await self.load(conn, now)
+            self.refresh_symbols(now)
+            tomorrow = _parse_day(self.get_dates(2, now)[1])
+            boundary = self.next_boundary(now)
+            wake_at = min(boundary, tomorrow) if boundary else tomorrow
+            await asyncio.sleep(max(wake_at - time.time(), 0) + 0.001)
+    #endregion
+
+    @property
+    def loaded_dates(self):
+        return self._loaded_dates
@@ -1,2 +1,88 @@
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
+
+
 def check_str(value:str):
-    return value and isinstance(value, str) and value.strip()
\ No newline at end of file
+    return value and isinstance(value, str) and value.strip()
+
+
+def memoize_query(version, maxsize=128):
+    """
+    Cacheia o resultado de uma consulta de classe por argumentos, enquanto version() não mudar.
+    O resultado deve ser imutável (tuplas), pois é devolvido compartilhado entre chamadas.
+    """
+    def decorator(func):
+        cache = OrderedDict()
+
+        @wraps(func)
+        def wrapper(cls, *args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            current = version()
+            try:
+                hit = cache.get(key)
+            except TypeError:
+                return func(cls, *args, **kwargs)
+            if hit is not None and hit[0] == current:
+                cache.move_to_end(key)
+                return hit[1]
+            result = func(cls, *args, **kwargs)
+            cache[key] = (current, result)
+            cache.move_to_end(key)
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_size = lambda: len(cache)
+        return wrapper
+    return decorator
+
+
+class SeriesBuffer:
+    """Buffer pré-alocado que mantém as últimas `capacity` amostras contíguas (view sem cópia para o TA-Lib)."""
+
+    def __init__(self, capacity, dtype=np.float64):
+        self._capacity = capacity
+        self._dtype = np.dtype(dtype)
+        self._fill = np.nan if self._dtype.kind == 'f' else 0
+        self._data = np.full(capacity * 2, self._fill, dtype=self._dtype)
+        self._end = 0
+
+    def append(self, value):
+        if self._end == len(self._data):
+            self._data[:self._capacity] = self._data[self._end - self._capacity:self._end]
+            self._end = self._capacity
+        self._data[self._end] = value
+        self._end += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._dtype)[-self._capacity:]
+        if self._end + len(values) > len(self._data):
+            keep = self.tail(self._capacity - len(values)).copy()
+            self._data[:len(keep)] = keep
+            self._end = len(keep)
+        self._data[self._end:self._end + len(values)] = values
+        self._end += len(values)
+
+    def resize(self, capacity):
+        if capacity <= self._capacity:
+            return
+        tail = self.tail(len(self)).copy()
+        self._capacity = capacity
+        self._data = np.full(capacity * 2, self._fill, dtype=self._dtype)
+        self._data[:len(tail)] = tail
+        self._end = len(tail)
+
+    def set_last(self, value):
+        self._data[self._end - 1] = value
+
+    def tail(self, n):
+        return self._data[max(self._end - n, 0):self._end]
+
+    def __len__(self):
+        return min(self._end, self._capacity)
+
+    @property
+    def last(self):
+        return self._data[self._end - 1] if self._end else np.nan
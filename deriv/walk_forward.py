@@ -0,0 +1,202 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+import numpy as np
+from estrategias import Dependencia
+from strategy_engine import IndicatorNode
+
+
+CACHE_DIR = Path(Path(__file__).parent, "..", "cache", "walk_forward")
+
+
+def expand_grid(grid):
+    """{'period': [5, 14], 'x': [1]} -> [{'period': 5, 'x': 1}, {'period': 14, 'x': 1}]"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+
+
+class WalkForward:
+    """
+    Walk-forward de parâmetros de estratégia sobre o TickArchive: otimiza em `train_cells` células,
+    testa nas `test_cells` seguintes e avança. As células têm `step` segundos e são alinhadas ao epoch,
+    então estender o período ou a grade recalcula só as células novas: os arrays de indicadores
+    (por Dependencia) e as estatísticas de cada (symbol, célula, parâmetros) ficam em cache no disco.
+    Cada sinal vale payout se o preço `horizon` amostras depois confirmar a direção, -1 caso contrário.
+    """
+
+    def __init__(self, archive, symbol, factory, grid, *, granularity=0, step=86400, train_cells=5, test_cells=1,
+                 horizon=5, payout=0.95, min_trades=30, cache_dir=CACHE_DIR):
+        self._archive = archive
+        self._symbol = symbol
+        self._factory = factory
+        self._grid = expand_grid(grid) if isinstance(grid, dict) else list(grid)
+        self._granularity = granularity
+        self._step = step
+        self._train_cells = train_cells
+        self._test_cells = test_cells
+        self._horizon = horizon
+        self._payout = payout
+        self._min_trades = min_trades
+        self._cache_dir = Path(cache_dir, symbol, f"g{granularity}_s{step}")
+        self._data = None
+        self._stats = {'cells_cached': 0, 'cells_computed': 0, 'indicators_cached': 0, 'indicators_computed': 0}
+
+    #region WalkForward_Cells
+    def cells(self, start, end):
+        first = int(start) - int(start) % self._step
+        return list(range(first, int(end), self._step))
+
+    def _load(self):
+        series = self._archive.series(self._symbol, self._granularity)
+        data = series.read()
+        self._data = {'series': series, 'epoch': data['epoch'],
+                      'close': data['quote'] if 'quote' in data else data['close'],
+                      'fields': {field: data.get(field, data.get('quote')) for field in ('open', 'high', 'low', 'close')}}
+
+    def _cell_dir(self, cell):
+        return Path(self._cache_dir, str(cell))
+
+    def _strategy_key(self, strategy, params):
+        return f"{type(strategy).__name__}{json.dumps(params, sort_keys=True)}|h={self._horizon}|p={self._payout}"
+    #endregion
+
+    #region WalkForward_Indicators
+    def _indicator(self, dep, cell, first, last, persist):
+        """Valores de `dep` nas linhas [first, last) da célula, com o aquecimento lido antes do início dela."""
+        file = Path(self._cell_dir(cell), f"ind_{_digest(dep.key)}.npy")
+        if file.exists():
+            values = np.load(file)
+            if len(values) == last - first:
+                self._stats['indicators_cached'] += 1
+                return values
+        chain = []
+        node = dep
+        while isinstance(node, Dependencia):
+            chain.append(node)
+            node = node.fonte
+        warmup = 0
+        nodes = []
+        for item in reversed(chain):
+            indicator = IndicatorNode(item.key, item.funcao, item.parametros, item.saida, None)
+            warmup += indicator.warmup
+            nodes.append(indicator)
+        inputs = self._data['fields'][node][max(first - warmup, 0):last]
+        for indicator in nodes:
+            inputs = indicator.compute(np.ascontiguousarray(inputs, dtype=np.float64))
+        values = np.asarray(inputs[len(inputs) - (last - first):], dtype=np.float64)
+        self._stats['indicators_computed'] += 1
+        if persist:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            np.save(file, values)
+        return values
+    #endregion
+
+    #region WalkForward_Evaluation
+    def cell_stats(self, cell, params_list=None):
+        """Estatísticas (trades, wins, pnl) de cada conjunto de parâmetros na célula; usa o cache quando possível."""
+        if self._data is None:
+            self._load()
+        params_list = self._grid if params_list is None else params_list
+        first, last = self._data['series'].rows(cell, cell + self._step - 1)
+        # Só persiste células fechadas: todas as linhas gravadas e `horizon` amostras depois do fim para os resultados.
+        persist = last + self._horizon < len(self._data['epoch']) and self._data['epoch'][-1] >= cell + self._step
+        file = Path(self._cell_dir(cell), "results.json")
+        cached = {}
+        if file.exists():
+            with open(file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get('rows') != last - first:
+                cached = {}
+        results = cached.get('results', {})
+        out = []
+        changed = False
+        for params in params_list:
+            strategy = self._factory(**params)
+            key = self._strategy_key(strategy, params)
+            if key in results:
+                self._stats['cells_cached'] += 1
+                out.append(results[key])
+                continue
+            stats = self._evaluate(strategy, cell, first, last, persist)
+            self._stats['cells_computed'] += 1
+            results[key] = stats
+            changed = True
+            out.append(stats)
+        if persist and changed:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = file.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({'rows': last - first, 'results': results}, f)
+            os.replace(tmp, file)
+        return out
+
+    def _evaluate(self, strategy, cell, first, last, persist):
+        if last - first <= 0:
+            return {'trades': 0, 'wins': 0, 'pnl': 0.0}
+        valores = {alias: self._indicator(dep, cell, first, last, persist) for alias, dep in strategy.dependencias.items()}
+        close = self._data['close']
+        precos = np.asarray(close[first:last], dtype=np.float64)
+        sinais = strategy.sinais(valores, precos)
+        future_index = np.arange(first, last) + self._horizon
+        valid = (sinais != 0) & (future_index < len(close))
+        future = np.asarray(close[np.minimum(future_index, len(close) - 1)], dtype=np.float64)
+        # Empate conta como derrota, como no Rise/Fall.
+        wins = valid & (np.sign(future - precos) == sinais)
+        trades = int(valid.sum())
+        n_wins = int(wins.sum())
+        return {'trades': trades, 'wins': n_wins, 'pnl': float(n_wins * self._payout - (trades - n_wins))}
+
+    @staticmethod
+    def _aggregate(stats_list):
+        trades = sum(stats['trades'] for stats in stats_list)
+        wins = sum(stats['wins'] for stats in stats_list)
+        pnl = sum(stats['pnl'] for stats in stats_list)
+        return {'trades': trades, 'wins': wins, 'pnl': pnl,
+                'win_rate': wins / trades if trades else None, 'mean_return': pnl / trades if trades else None}
+
+    def run(self, start, end):
+        """Executa o walk-forward em [start, end); devolve (folds, resumo fora da amostra)."""
+        started = time.perf_counter()
+        self._load()
+        cells = self.cells(start, end)
+        per_cell = {cell: self.cell_stats(cell) for cell in cells}
+        folds = []
+        for offset in range(0, len(cells) - self._train_cells - self._test_cells + 1, self._test_cells):
+            train = cells[offset:offset + self._train_cells]
+            test = cells[offset + self._train_cells:offset + self._train_cells + self._test_cells]
+            best = None
+            for index, params in enumerate(self._grid):
+                score = self._aggregate([per_cell[cell][index] for cell in train])
+                if score['trades'] < self._min_trades:
+                    continue
+                if best is None or score['mean_return'] > best[1]['mean_return']:
+                    best = (index, score)
+            if best is None:
+                continue
+            folds.append({
+                'train': (train[0], train[-1] + self._step),
+                'test': (test[0], test[-1] + self._step),
+                'params': self._grid[best[0]],
+                'train_stats': best[1],
+                'test_stats': self._aggregate([per_cell[cell][best[0]] for cell in test]),
+            })
+        summary = self._aggregate([fold['test_stats'] for fold in folds])
+        summary['folds'] = len(folds)
+        summary['seconds'] = time.perf_counter() - started
+        return folds, summary
+    #endregion
+
+    @property
+    def stats(self):
+        return dict(self._stats)
+
+    @property
+    def grid(self):
+        return list(self._grid)